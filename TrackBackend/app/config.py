@@ -8,8 +8,10 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Mapping
 from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
 from pydantic import BaseModel
@@ -28,6 +30,7 @@ class AppSettings(BaseModel):
     http_connect_timeout_seconds: float = 10.0
     http_max_retries: int = 2
     http_retry_delay_seconds: float = 1.0
+    nearby_deadline_seconds: float = 3.0
     show_ghost_trains: bool = False
 
 
@@ -69,7 +72,7 @@ class Settings(BaseModel):
 
 # Mapping from a single-letter (or multi-letter) line ID to the settings.json
 # URL key so we can look up the correct GTFS-Realtime feed.
-LINE_TO_URL_KEY: dict[str, str] = {
+LINE_TO_URL_KEY: Mapping[str, str] = MappingProxyType({
     "A": "subway_ace",
     "C": "subway_ace",
     "E": "subway_ace",
@@ -92,7 +95,31 @@ LINE_TO_URL_KEY: dict[str, str] = {
     "Z": "subway_jz",
     "L": "subway_l",
     "SI": "subway_si",
-}
+})
+
+
+def _build_line_table() -> tuple[str | None, ...]:
+    """Index single-character line IDs (upper and lower case) by code point."""
+    table: list[str | None] = [None] * 128
+    for line, key in LINE_TO_URL_KEY.items():
+        if len(line) == 1:
+            table[ord(line)] = key
+            table[ord(line.lower())] = key
+    return tuple(table)
+
+
+# Every line except "SI" is a single ASCII character, so most lookups are a
+# tuple index instead of ``.upper()`` plus a dict probe.
+_LINE_TABLE = _build_line_table()
+
+
+def _feed_key(line_id: str) -> str | None:
+    """Return the settings.json URL key for *line_id*, or *None*."""
+    if len(line_id) == 1:
+        code = ord(line_id)
+        if code < 128:
+            return _LINE_TABLE[code]
+    return LINE_TO_URL_KEY.get(line_id.upper())
 
 
 @lru_cache(maxsize=1)
@@ -102,11 +129,19 @@ def get_settings() -> Settings:
     return Settings(**raw)
 
 
+@lru_cache(maxsize=1)
+def _urls_dict() -> Mapping[str, Any]:
+    """Return the *urls* block as a read-only mapping, built once.
+
+    Reads the model's ``__dict__`` directly instead of ``model_dump()`` so the
+    per-request feed lookup never goes through Pydantic serialization.
+    """
+    return MappingProxyType(get_settings().urls.__dict__.copy())
+
+
 def get_feed_url(line_id: str) -> str | None:
     """Return the MTA feed URL for the given subway line, or *None*."""
-    settings = get_settings()
-    key = LINE_TO_URL_KEY.get(line_id.upper())
+    key = _feed_key(line_id)
     if key is None:
         return None
-    urls_dict = settings.urls.model_dump()
-    return urls_dict.get(key)
+    return _urls_dict().get(key)
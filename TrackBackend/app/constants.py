@@ -0,0 +1,25 @@
+#
+# constants.py
+# TrackBackend
+#
+# Static lookup tables shared across routers.
+#
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from types import MappingProxyType
+
+# Subway line → hex color mapping (official MTA colors).
+SUBWAY_COLORS: Mapping[str, str] = MappingProxyType({
+    "1": "#EE352E", "2": "#EE352E", "3": "#EE352E",
+    "4": "#00933C", "5": "#00933C", "6": "#00933C",
+    "7": "#B933AD",
+    "A": "#0039A6", "C": "#0039A6", "E": "#0039A6",
+    "B": "#FF6319", "D": "#FF6319", "F": "#FF6319", "M": "#FF6319",
+    "G": "#6CBE45",
+    "J": "#996633", "Z": "#996633",
+    "L": "#A7A9AC",
+    "N": "#FCCC0A", "Q": "#FCCC0A", "R": "#FCCC0A", "W": "#FCCC0A",
+    "S": "#808183", "SI": "#808183",
+})
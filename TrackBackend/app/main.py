@@ -8,18 +8,98 @@
 
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import contextlib
+from functools import lru_cache
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from google.protobuf.internal import api_implementation  # type: ignore[import-untyped]
 
-from app.config import get_settings
+from app.config import AppSettings, get_settings
 from app.routers import bus, lirr, nearby, status, subway
+from app.services.http_client import close_client
+from app.services.subway_shapes import warmup as warm_static_gtfs
 from app.utils.logger import TrackLogger
 
+# Access-log entries are queued by the middleware and printed in batches by
+# a single background task, so responses never wait on terminal I/O.
+_LOG_QUEUE_SIZE = 4096
+_LOG_BATCH_SIZE = 128
+_LOG_FLUSH_SECONDS = 0.05
+
+_log_queue: asyncio.Queue[tuple[str, str, str, int]] | None = None
+_log_task: asyncio.Task[None] | None = None
+
+
+async def _drain_request_log(queue: asyncio.Queue[tuple[str, str, str, int]]) -> None:
+    """Collect up to a batch of entries (or wait briefly) and flush them."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + _LOG_FLUSH_SECONDS
+        try:
+            while len(batch) < _LOG_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Also runs on cancellation at shutdown so no entries are lost
+            TrackLogger.requests(batch)
+
+
+def _check_protobuf_backend() -> None:
+    """Complain loudly if protobuf fell back to its pure-Python parser.
+
+    GTFS-RT decoding is the hottest path in the service, and the Python
+    backend is roughly ten times slower than upb.  That usually means a
+    stray PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python in the environment.
+    """
+    if api_implementation.Type() == "python":
+        TrackLogger.error(
+            "protobuf is using the pure-Python backend; GTFS-RT decoding will "
+            "be ~10x slower. Unset PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION."
+        )
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Start the access-log drain on startup; flush it and close the shared
+    HTTP client on shutdown."""
+    global _log_queue, _log_task
+    TrackLogger.startup()
+    _check_protobuf_backend()
+    # Parse the static GTFS files (~0.2 s) before serving, in a worker thread
+    # so the event loop stays free, rather than on the first map request.
+    await asyncio.to_thread(warm_static_gtfs)
+    _log_queue = asyncio.Queue(maxsize=_LOG_QUEUE_SIZE)
+    _log_task = asyncio.create_task(_drain_request_log(_log_queue))
+    try:
+        yield
+    finally:
+        _log_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _log_task
+        if not _log_queue.empty():
+            leftover = []
+            while not _log_queue.empty():
+                leftover.append(_log_queue.get_nowait())
+            TrackLogger.requests(leftover)
+        _log_queue = None
+        _log_task = None
+        await close_client()
+
+
+# No default_response_class: with a response_model, FastAPI serializes
+# straight to JSON bytes in pydantic-core.  Any custom response class
+# (ORJSONResponse included) falls back to jsonable_encoder and is slower.
 app = FastAPI(
     title="Track API",
     description="Proxy API for the Track NYC Transit iOS app",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Register routers
@@ -30,22 +110,31 @@ app.include_router(bus.router)
 app.include_router(nearby.router)
 
 
-@app.on_event("startup")
-async def startup_event():
-    TrackLogger.startup()
-
-
 # Middleware to log every request with color and query params
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     response = await call_next(request)
-    query = f"?{request.url.query}" if request.url.query else ""
-    TrackLogger.request(request.method, f"{request.url.path}{query}", response.status_code)
+    if not TrackLogger.requests_enabled:
+        return response
+    url = request.url
+    entry = (request.method, url.path, url.query, response.status_code)
+    if _log_queue is None:
+        # Lifespan not running (e.g. a bare TestClient) — log inline
+        TrackLogger.request(*entry)
+    else:
+        # Drop the entry rather than slow the response if the log backs up
+        with contextlib.suppress(asyncio.QueueFull):
+            _log_queue.put_nowait(entry)
     return response
 
 
-@app.get("/config")
-async def config() -> dict[str, Any]:
+@lru_cache(maxsize=1)
+def _config_body() -> bytes:
+    """Serialize *app_settings* once — settings are immutable after startup."""
+    return get_settings().app_settings.model_dump_json().encode()
+
+
+@app.get("/config", response_model=AppSettings)
+async def config() -> Response:
     """Return the *app_settings* block from settings.json."""
-    settings = get_settings()
-    return settings.app_settings.model_dump()
+    return Response(content=_config_body(), media_type="application/json")
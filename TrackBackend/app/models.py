@@ -9,10 +9,21 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
-class TrackArrival(BaseModel):
+class _Schema(BaseModel):
+    """Base for response schemas.
+
+    Instances are frozen: cached results are shared between requests, so
+    nothing may mutate a model after it is built.  ``extra`` stays at the
+    default "ignore" — "forbid" adds a per-field scan to every validation.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+
+class TrackArrival(_Schema):
     """A single upcoming train arrival at a station."""
 
     route_id: str = ""
@@ -23,7 +34,7 @@ class TrackArrival(BaseModel):
     status: str = "On Time"
 
 
-class TransitAlert(BaseModel):
+class TransitAlert(_Schema):
     """A critical service alert."""
 
     route_id: str | None = None
@@ -32,7 +43,7 @@ class TransitAlert(BaseModel):
     severity: str
 
 
-class ElevatorStatus(BaseModel):
+class ElevatorStatus(_Schema):
     """An elevator or escalator that is currently out of service."""
 
     station: str
@@ -41,7 +52,7 @@ class ElevatorStatus(BaseModel):
     outage_since: str | None = None
 
 
-class BusRoute(BaseModel):
+class BusRoute(_Schema):
     """A normalized bus route from the OBA API."""
 
     id: str
@@ -51,7 +62,7 @@ class BusRoute(BaseModel):
     description: str
 
 
-class BusStop(BaseModel):
+class BusStop(_Schema):
     """A normalized bus stop from the OBA API."""
 
     id: str
@@ -61,7 +72,7 @@ class BusStop(BaseModel):
     direction: str | None = None
 
 
-class BusArrival(BaseModel):
+class BusArrival(_Schema):
     """A normalized real-time bus arrival from the SIRI API."""
 
     route_id: str
@@ -73,7 +84,7 @@ class BusArrival(BaseModel):
     bearing: float | None = None
 
 
-class NearbyTransitArrival(BaseModel):
+class NearbyTransitArrival(_Schema):
     """A single upcoming transit arrival (bus or train) near the user."""
 
     route_id: str
@@ -87,14 +98,14 @@ class NearbyTransitArrival(BaseModel):
     stop_lon: float | None = None
 
 
-class DirectionArrivals(BaseModel):
+class DirectionArrivals(_Schema):
     """Arrivals for a single direction of a route."""
 
     direction: str
     arrivals: list[NearbyTransitArrival]
 
 
-class GroupedNearbyTransit(BaseModel):
+class GroupedNearbyTransit(_Schema):
     """Arrivals grouped by route with directions as sub-groups.
 
     The iOS app shows one card per route; tapping opens a detail sheet
@@ -108,7 +119,7 @@ class GroupedNearbyTransit(BaseModel):
     directions: list[DirectionArrivals]
 
 
-class BusVehicle(BaseModel):
+class BusVehicle(_Schema):
     """A live bus vehicle position from the SIRI vehicle-monitoring API."""
 
     vehicle_id: str
@@ -120,7 +131,7 @@ class BusVehicle(BaseModel):
     status_text: str | None = None
 
 
-class RouteShape(BaseModel):
+class RouteShape(_Schema):
     """Encoded polyline and stop list for a bus route."""
 
     route_id: str
@@ -128,7 +139,16 @@ class RouteShape(BaseModel):
     stops: list[BusStop]
 
 
-class SubwayLineOverlay(BaseModel):
+class RouteBundle(_Schema):
+    """Everything a bus route screen needs, fetched in one round trip."""
+
+    route_id: str
+    shape: RouteShape
+    vehicles: list[BusVehicle]
+    arrivals: list[BusArrival]
+
+
+class SubwayLineOverlay(_Schema):
     """Lightweight shape for drawing a single subway line on the map.
 
     Intentionally excludes stops to keep the all-lines payload small.
@@ -139,13 +159,13 @@ class SubwayLineOverlay(BaseModel):
     polylines: list[str]
 
 
-class AllSubwayLinesResponse(BaseModel):
+class AllSubwayLinesResponse(_Schema):
     """All subway line overlays for drawing the full system map."""
 
     lines: list[SubwayLineOverlay]
 
 
-class SubwayStation(BaseModel):
+class SubwayStation(_Schema):
     """A subway station marker with list of lines served."""
 
     id: str
@@ -155,7 +175,7 @@ class SubwayStation(BaseModel):
     routes: list[str]
 
 
-class AllSubwayStationsResponse(BaseModel):
+class AllSubwayStationsResponse(_Schema):
     """All subway stations for the system map."""
 
     stations: list[SubwayStation]
@@ -8,64 +8,85 @@
 
 from __future__ import annotations
 
+import functools
+import gzip
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
 import httpx
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from app.config import get_settings
-from app.models import BusArrival, BusRoute, BusStop, BusVehicle, RouteShape
+from app.models import BusArrival, BusRoute, BusStop, BusVehicle, RouteBundle, RouteShape
 from app.services.bus_client import (
+    STOPS_FOR_ROUTE_TTL_SECONDS,
     get_nearby_stops,
     get_realtime_arrivals,
+    get_route_bundle,
     get_route_shape,
     get_routes,
     get_stops,
     get_vehicle_positions,
 )
+from app.utils.cache import async_ttl_cache
 from app.utils.logger import TrackLogger
 
 router = APIRouter(prefix="/bus", tags=["bus"])
 
+# The encoded route-shape body lives as long as the stops-for-route data it
+# is built from, and clients may cache it for as long.
+_ROUTE_SHAPE_CACHE_CONTROL = f"public, max-age={int(STOPS_FOR_ROUTE_TTL_SECONDS)}"
+
+T = TypeVar("T")
+
+
+def _map_bus_errors(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Translate upstream bus API failures into clean HTTP errors.
+
+    401/403 from MTA Bus Time means a bad key or exhausted quota, which
+    the iOS client shows as a 503.  Anything else becomes a 502.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        try:
+            return await fn(*args, **kwargs)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code in (401, 403):
+                raise HTTPException(
+                    status_code=503,
+                    detail="Bus API authentication failed or quota exceeded",
+                ) from exc
+            raise HTTPException(status_code=502, detail=str(exc)) from exc
+        except Exception as exc:
+            raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+    return wrapper
+
 
 @router.get("/routes", response_model=list[BusRoute])
+@_map_bus_errors
 async def bus_routes() -> list[BusRoute]:
     """Return all MTA bus routes."""
-    try:
-        return await get_routes()
-    except httpx.HTTPStatusError as exc:
-        if exc.response.status_code in (401, 403):
-            raise HTTPException(
-                status_code=503,
-                detail="Bus API authentication failed or quota exceeded",
-            ) from exc
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return await get_routes()
 
 
 @router.get("/stops/{route_id:path}", response_model=list[BusStop])
+@_map_bus_errors
 async def bus_stops(route_id: str) -> list[BusStop]:
     """Return stops for a bus route (e.g. ``/bus/stops/MTA NYCT_B63``)."""
-    try:
-        stops = await get_stops(route_id)
-        if not stops and not route_id.startswith("MTA"):
-            for prefix in ["MTA NYCT_", "MTA BUS_"]:
-                full_id = f"{prefix}{route_id}"
-                stops = await get_stops(full_id)
-                if stops:
-                    return stops
-        return stops
-    except httpx.HTTPStatusError as exc:
-        if exc.response.status_code in (401, 403):
-            raise HTTPException(
-                status_code=503,
-                detail="Bus API authentication failed or quota exceeded",
-            ) from exc
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    stops = await get_stops(route_id)
+    if not stops and not route_id.startswith("MTA"):
+        for prefix in ["MTA NYCT_", "MTA BUS_"]:
+            full_id = f"{prefix}{route_id}"
+            stops = await get_stops(full_id)
+            if stops:
+                return stops
+    return stops
 
 
 @router.get("/nearby", response_model=list[BusStop])
+@_map_bus_errors
 async def bus_nearby(
     lat: float = Query(..., description="Latitude"),
     lon: float = Query(..., description="Longitude"),
@@ -75,36 +96,18 @@ async def bus_nearby(
     settings = get_settings()
     effective_radius = radius if radius is not None else settings.app_settings.search_radius_meters
     TrackLogger.location(lat, lon, "bus/nearby")
-    try:
-        return await get_nearby_stops(lat, lon, radius_m=effective_radius)
-    except httpx.HTTPStatusError as exc:
-        if exc.response.status_code in (401, 403):
-            raise HTTPException(
-                status_code=503,
-                detail="Bus API authentication failed or quota exceeded",
-            ) from exc
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return await get_nearby_stops(lat, lon, radius_m=effective_radius)
 
 
 @router.get("/live/{stop_id:path}", response_model=list[BusArrival])
+@_map_bus_errors
 async def bus_live(stop_id: str) -> list[BusArrival]:
     """Return real-time bus arrivals at a stop (e.g. ``/bus/live/MTA_308214``)."""
-    try:
-        return await get_realtime_arrivals(stop_id)
-    except httpx.HTTPStatusError as exc:
-        if exc.response.status_code in (401, 403):
-            raise HTTPException(
-                status_code=503,
-                detail="Bus API authentication failed or quota exceeded",
-            ) from exc
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return await get_realtime_arrivals(stop_id)
 
 
 @router.get("/vehicles/{route_id:path}", response_model=list[BusVehicle])
+@_map_bus_errors
 async def bus_vehicles(route_id: str) -> list[BusVehicle]:
     """Return live vehicle positions for a bus route.
 
@@ -114,46 +117,81 @@ async def bus_vehicles(route_id: str) -> list[BusVehicle]:
     and distance status text — everything needed to plot live buses
     on a map.
     """
-    try:
-        return await get_vehicle_positions(route_id)
-    except httpx.HTTPStatusError as exc:
-        if exc.response.status_code in (401, 403):
-            raise HTTPException(
-                status_code=503,
-                detail="Bus API authentication failed or quota exceeded",
-            ) from exc
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return await get_vehicle_positions(route_id)
+
+
+@router.get("/route-bundle/{route_id:path}", response_model=RouteBundle)
+@_map_bus_errors
+async def bus_route_bundle(
+    route_id: str,
+    stop_id: str | None = Query(None, description="Stop to include live arrivals for"),
+) -> RouteBundle:
+    """Return a route's shape, live vehicles and optional stop arrivals.
+
+    Example: ``/bus/route-bundle/MTA NYCT_B63?stop_id=MTA_308214``
+
+    One call for the route detail screen: the upstream requests are made
+    concurrently instead of as three sequential client round trips.
+    """
+    return await get_route_bundle(route_id, stop_id)
 
 
 @router.get("/route-shape/{route_id:path}", response_model=RouteShape)
-async def bus_route_shape(route_id: str) -> RouteShape:
+@_map_bus_errors
+async def bus_route_shape(route_id: str, request: Request) -> Response:
     """Return the route shape (polylines + stops) for a bus route.
 
     Example: ``/bus/route-shape/MTA NYCT_B63``
 
     Returns Google-encoded polylines for drawing the route on a map,
-    along with all stops on the route for annotation.
+    along with all stops on the route for annotation.  The JSON body
+    and its gzip encoding are built once per route and served as-is.
     """
     try:
-        data = await get_route_shape(route_id)
-        if not data.polylines and not data.stops and not route_id.startswith("MTA"):
-            # If "M11" returns nothing, try "MTA NYCT_M11"
-            # We can try a few common prefixes
-            for prefix in ["MTA NYCT_", "MTA BUS_"]:
-                full_id = f"{prefix}{route_id}"
-                data = await get_route_shape(full_id)
-                if data.polylines or data.stops:
-                    return data
-        return data
-
-    except httpx.HTTPStatusError as exc:
-        if exc.response.status_code in (401, 403):
-            raise HTTPException(
-                status_code=503,
-                detail="Bus API authentication failed or quota exceeded",
-            ) from exc
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=str(exc)) from exc
+        body, body_gz = await _route_shape_body(route_id)
+    except _EmptyRouteShape as empty:
+        # Often a transient upstream miss, so don't let clients keep it
+        return Response(
+            content=empty.body,
+            media_type="application/json",
+            headers={"Cache-Control": "no-store"},
+        )
+
+    headers = {
+        "Cache-Control": _ROUTE_SHAPE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = body_gz
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class _EmptyRouteShape(Exception):
+    """Raised instead of returning an empty shape, which the cache won't keep."""
+
+    def __init__(self, body: bytes) -> None:
+        super().__init__()
+        self.body = body
+
+
+@async_ttl_cache(STOPS_FOR_ROUTE_TTL_SECONDS)
+async def _route_shape_body(route_id: str) -> tuple[bytes, bytes]:
+    """Fetch a route shape and return its ``(json, gzipped json)`` bodies.
+
+    Raises :class:`_EmptyRouteShape` when no prefix variant has polylines
+    or stops, so an empty upstream reply is retried on the next request.
+    """
+    data = await get_route_shape(route_id)
+    if not data.polylines and not data.stops and not route_id.startswith("MTA"):
+        # If "M11" returns nothing, try "MTA NYCT_M11"
+        # We can try a few common prefixes
+        for prefix in ["MTA NYCT_", "MTA BUS_"]:
+            full_id = f"{prefix}{route_id}"
+            data = await get_route_shape(full_id)
+            if data.polylines or data.stops:
+                break
+    body = data.model_dump_json().encode()
+    if not data.polylines and not data.stops:
+        raise _EmptyRouteShape(body)
+    return body, gzip.compress(body, compresslevel=6)
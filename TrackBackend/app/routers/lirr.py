@@ -7,11 +7,14 @@
 
 from __future__ import annotations
 
+import time
+from operator import itemgetter
+
 from fastapi import APIRouter, HTTPException
+from google.transit import gtfs_realtime_pb2  # type: ignore[import-untyped]
 
 from app.config import get_settings
 from app.models import TrackArrival
-from app.services.data_cleaner import _minutes_until
 from app.services.mta_client import fetch_protobuf
 
 router = APIRouter(tags=["lirr"])
@@ -20,8 +23,6 @@ router = APIRouter(tags=["lirr"])
 @router.get("/lirr", response_model=list[TrackArrival])
 async def lirr_arrivals() -> list[TrackArrival]:
     """Return upcoming LIRR arrivals from the GTFS-Realtime feed."""
-    from google.transit import gtfs_realtime_pb2  # type: ignore[import-untyped]
-
     settings = get_settings()
     url = settings.urls.lirr
 
@@ -33,24 +34,33 @@ async def lirr_arrivals() -> list[TrackArrival]:
     feed = gtfs_realtime_pb2.FeedMessage()
     feed.ParseFromString(raw)
 
-    arrivals: list[TrackArrival] = []
+    # Collect plain (stop_id, route_id, minutes) tuples and sort once before
+    # building the response models.  Unset sub-messages read as empty
+    # defaults, so plain truthiness checks replace the HasField() calls.
+    now = int(time.time())
+    rows: list[tuple[str, str, int]] = []
+    append = rows.append
     for entity in feed.entity:
-        if not entity.HasField("trip_update"):
-            continue
         trip = entity.trip_update
+        if not trip.stop_time_update:
+            continue
+        route_id = trip.trip.route_id
         for stu in trip.stop_time_update:
-            arrival_time = stu.arrival.time if stu.HasField("arrival") else 0
-            if arrival_time == 0:
-                continue
-            minutes = _minutes_until(arrival_time)
-            arrivals.append(
-                TrackArrival(
-                    station=stu.stop_id,
-                    direction=trip.trip.route_id,
-                    minutes_away=minutes,
-                    status="On Time",
-                )
-            )
-
-    arrivals.sort(key=lambda a: a.minutes_away)
-    return arrivals
+            arrival_time = stu.arrival.time
+            if arrival_time:
+                minutes = (arrival_time - now) // 60
+                append((stu.stop_id, route_id, minutes if minutes > 0 else 0))
+
+    rows.sort(key=itemgetter(2))
+
+    # Fields come straight from the decoded feed — skip re-validation
+    construct = TrackArrival.model_construct
+    return [
+        construct(
+            station=stop_id,
+            direction=route_id,
+            minutes_away=minutes,
+            status="On Time",
+        )
+        for stop_id, route_id, minutes in rows
+    ]
@@ -14,35 +14,32 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import math
+import time
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timezone
+from operator import attrgetter
 
 from fastapi import APIRouter, Query
 
 from app.config import get_settings
-from app.models import DirectionArrivals, GroupedNearbyTransit, NearbyTransitArrival
-from app.services.bus_client import get_nearby_stops, get_realtime_arrivals
+from app.constants import SUBWAY_COLORS
+from app.models import BusStop, DirectionArrivals, GroupedNearbyTransit, NearbyTransitArrival
+from app.services.bus_client import get_nearby_stops, get_realtime_arrivals_batch
 from app.services.data_cleaner import get_arrivals_for_line
 from app.services.station_lookup import get_nearby_stop_ids, get_stop_info
 from app.utils.logger import TrackLogger
 
-# Subway line → hex color mapping (official MTA colors).
-_SUBWAY_COLORS: dict[str, str] = {
-    "1": "#EE352E", "2": "#EE352E", "3": "#EE352E",
-    "4": "#00933C", "5": "#00933C", "6": "#00933C",
-    "7": "#B933AD",
-    "A": "#0039A6", "C": "#0039A6", "E": "#0039A6",
-    "B": "#FF6319", "D": "#FF6319", "F": "#FF6319", "M": "#FF6319",
-    "G": "#6CBE45",
-    "J": "#996633", "Z": "#996633",
-    "L": "#A7A9AC",
-    "N": "#FCCC0A", "Q": "#FCCC0A", "R": "#FCCC0A", "W": "#FCCC0A",
-    "S": "#808183", "SI": "#808183",
-}
-
 # Default bus color (MTA blue) — used when bus routes don't provide one
 _BUS_DEFAULT_COLOR = "#0039A6"
 
+_UTC = timezone.utc
+
+# C-level sort keys (no Python frame per comparison, unlike a lambda)
+_by_minutes = attrgetter("minutes_away")
+_by_direction = attrgetter("direction")
+
 router = APIRouter(tags=["nearby"])
 
 
@@ -62,8 +59,9 @@ async def nearby_transit(
     effective_radius = radius if radius is not None else settings.app_settings.search_radius_meters
     TrackLogger.location(lat, lon, "nearby")
     results = await _collect_all(lat, lon, effective_radius)
-    results.sort(key=lambda a: a.minutes_away)
-    return results[:settings.app_settings.max_nearby_results]
+    return heapq.nsmallest(
+        settings.app_settings.max_nearby_results, results, key=_by_minutes,
+    )
 
 
 @router.get("/nearby/grouped", response_model=list[GroupedNearbyTransit])
@@ -95,27 +93,36 @@ async def nearby_transit_grouped(
 async def _collect_all(
     lat: float, lon: float, radius: int | None = None,
 ) -> list[NearbyTransitArrival]:
-    """Gather subway + bus arrivals in parallel."""
+    """Gather subway + bus arrivals in parallel.
+
+    Both branches share one deadline (``nearby_deadline_seconds``).  A
+    branch still running when it expires is cancelled and the response
+    is built from whatever finished, so one slow upstream API can't
+    hold the whole request hostage.
+    """
     settings = get_settings()
     effective_radius = radius if radius is not None else settings.app_settings.search_radius_meters
     results: list[NearbyTransitArrival] = []
 
-    subway_task = _fetch_nearby_subway(lat, lon, effective_radius)
-    bus_task = _fetch_nearby_buses(lat, lon, effective_radius)
+    tasks = {
+        asyncio.create_task(_fetch_nearby_subway(lat, lon, effective_radius)): "Subway",
+        asyncio.create_task(_fetch_nearby_buses(lat, lon, effective_radius)): "Bus",
+    }
+    deadline = settings.app_settings.nearby_deadline_seconds
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
 
-    subway_results, bus_results = await asyncio.gather(
-        subway_task, bus_task, return_exceptions=True,
-    )
+    for task in pending:
+        task.cancel()
+        TrackLogger.error(f"{tasks[task]} feed timed out after {deadline:g}s")
 
-    if isinstance(subway_results, list):
-        results.extend(subway_results)
-    elif isinstance(subway_results, Exception):
-        TrackLogger.error(f"Subway feed failed: {subway_results}")
-
-    if isinstance(bus_results, list):
-        results.extend(bus_results)
-    elif isinstance(bus_results, Exception):
-        TrackLogger.error(f"Bus feed failed: {bus_results}")
+    for task, label in tasks.items():
+        if task not in done:
+            continue
+        exc = task.exception()
+        if exc is not None:
+            TrackLogger.error(f"{label} feed failed: {exc}")
+        else:
+            results.extend(task.result())
 
     return results
 
@@ -127,9 +134,7 @@ async def _collect_all(
 
 def _display_name(route_id: str) -> str:
     """Strip ``MTA NYCT_`` prefix for display."""
-    if route_id.startswith("MTA NYCT_"):
-        return route_id[9:]
-    return route_id
+    return route_id.removeprefix("MTA NYCT_")
 
 
 def _group_arrivals(flat: list[NearbyTransitArrival]) -> list[GroupedNearbyTransit]:
@@ -139,36 +144,50 @@ def _group_arrivals(flat: list[NearbyTransitArrival]) -> list[GroupedNearbyTrans
     or compass directions like "SW" / "NE" for buses).  Arrivals
     inside each direction are sorted by ``minutes_away``.
     """
-    by_route: dict[str, dict[str, list[NearbyTransitArrival]]] = defaultdict(
-        lambda: defaultdict(list),
-    )
-    route_meta: dict[str, tuple[str, str]] = {}  # route_id → (mode, display_name)
+    # One flat (route_id, direction) → arrivals table: a single hash probe
+    # per arrival instead of two nested ones.
+    buckets: dict[tuple[str, str], list[NearbyTransitArrival]] = defaultdict(list)
+    modes: dict[str, str] = {}  # route_id → mode of its first arrival
+    soonest: dict[str, int] = {}  # route_id → smallest minutes_away
 
     for a in flat:
-        by_route[a.route_id][a.direction].append(a)
-        if a.route_id not in route_meta:
-            route_meta[a.route_id] = (a.mode, _display_name(a.route_id))
-
+        route_id = a.route_id
+        minutes = a.minutes_away
+        buckets[(route_id, a.direction)].append(a)
+        modes.setdefault(route_id, a.mode)
+        if minutes < soonest.get(route_id, minutes + 1):
+            soonest[route_id] = minutes
+
+    by_route: dict[str, list[tuple[str, list[NearbyTransitArrival]]]] = {}
+    for (route_id, direction), arrivals in buckets.items():
+        by_route.setdefault(route_id, []).append((direction, arrivals))
+
+    # Everything below is assembled from already-built arrival models,
+    # so the wrapper models skip re-validating their nested lists.
     groups: list[GroupedNearbyTransit] = []
-    for route_id, dir_map in by_route.items():
-        mode, display = route_meta[route_id]
+    for route_id, dir_buckets in by_route.items():
+        mode = modes[route_id]
+        display = _display_name(route_id)
         # Assign color: subway lines use the official palette,
         # bus routes get the default MTA blue
         if mode == "subway":
-            color = _SUBWAY_COLORS.get(display.upper())
+            # GTFS-RT route ids are already upper-case, like the table keys
+            color = SUBWAY_COLORS.get(display)
         else:
             color = _BUS_DEFAULT_COLOR
 
         directions: list[DirectionArrivals] = []
-        for direction, arrivals in dir_map.items():
-            arrivals.sort(key=lambda a: a.minutes_away)
-            directions.append(DirectionArrivals(direction=direction, arrivals=arrivals))
+        for direction, arrivals in dir_buckets:
+            arrivals.sort(key=_by_minutes)
+            directions.append(
+                DirectionArrivals.model_construct(direction=direction, arrivals=arrivals),
+            )
 
         # Sort directions alphabetically for consistency
-        directions.sort(key=lambda d: d.direction)
+        directions.sort(key=_by_direction)
 
         groups.append(
-            GroupedNearbyTransit(
+            GroupedNearbyTransit.model_construct(
                 route_id=route_id,
                 display_name=display,
                 mode=mode,
@@ -177,22 +196,13 @@ def _group_arrivals(flat: list[NearbyTransitArrival]) -> list[GroupedNearbyTrans
             )
         )
 
-    # Sort groups by the soonest arrival across all directions
-    groups.sort(key=_soonest_minutes)
+    # Sort groups by the soonest arrival across all directions, tracked
+    # while bucketing so the groups don't need to be walked again
+    groups.sort(key=lambda g: soonest[g.route_id])
 
     return groups
 
 
-def _soonest_minutes(group: GroupedNearbyTransit) -> int:
-    """Return the smallest ``minutes_away`` across all directions."""
-    mins = [
-        a.minutes_away
-        for d in group.directions
-        for a in d.arrivals
-    ]
-    return min(mins) if mins else 999
-
-
 # ---------------------------------------------------------------------------
 # Subway helpers
 # ---------------------------------------------------------------------------
@@ -231,6 +241,8 @@ async def _fetch_nearby_subway(
     success_count = 0
     total_raw = 0
     total_kept = 0
+    # Fields come from our own parsed feeds — skip re-validation
+    construct = NearbyTransitArrival.model_construct
     for line, arrivals in zip(feed_lines, feed_results):
         if isinstance(arrivals, Exception):
             TrackLogger.error(f"Subway feed '{line}' failed: {arrivals}")
@@ -261,7 +273,7 @@ async def _fetch_nearby_subway(
             display_dir = arrival.destination if arrival.destination else arrival.direction
             
             results.append(
-                NearbyTransitArrival(
+                construct(
                     route_id=arrival.route_id or line,
                     stop_name=stop_name,
                     direction=display_dir,
@@ -301,7 +313,9 @@ async def _fetch_nearby_buses(
     results: list[NearbyTransitArrival] = []
 
     try:
-        stops = await get_nearby_stops(lat, lon, radius_m=effective_radius)
+        # No retries: a 504 plus the retry pause would already overrun
+        # nearby_deadline_seconds, and the cancelled fetch caches nothing.
+        stops = await get_nearby_stops(lat, lon, radius_m=effective_radius, retries=0)
     except Exception as exc:
         TrackLogger.error(f"Bus stops fetch failed: {exc}")
         return results
@@ -311,29 +325,28 @@ async def _fetch_nearby_buses(
         return results
 
     # Fetch arrivals for the nearest stops (limit from settings)
+    now_ts = time.time()
     bus_stops_limit = settings.app_settings.nearby_bus_stops_limit
-    tasks = [get_realtime_arrivals(stop.id) for stop in stops[:bus_stops_limit]]
-    stop_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    for i, arrivals in enumerate(stop_results):
-        if isinstance(arrivals, Exception):
-            stop_name = stops[i].name if i < len(stops) else "unknown"
-            TrackLogger.error(f"Bus arrivals for stop '{stop_name}' failed: {arrivals}")
+    nearest = _nearest_stops(stops, lat, lon, bus_stops_limit)
+    arrivals_by_stop = await get_realtime_arrivals_batch([stop.id for stop in nearest])
+
+    # Fields come from already-validated BusStop/BusArrival models
+    construct = NearbyTransitArrival.model_construct
+    for stop in nearest:
+        arrivals = arrivals_by_stop.get(stop.id)
+        if not arrivals:
             continue
-        if not isinstance(arrivals, list):
-            continue
-        stop = stops[i] if i < len(stops) else None
-        stop_name = stop.name if stop else "Bus Stop"
-        stop_lat = stop.lat if stop else None
-        stop_lon = stop.lon if stop else None
+        stop_name = stop.name
+        stop_lat = stop.lat
+        stop_lon = stop.lon
+        # Use the bus stop's compass direction (e.g. "SW") for grouping,
+        # falling back to the stop name when direction is unavailable.
+        # status_text stays in the `status` field for display purposes.
+        bus_direction = stop.direction or stop_name
         for arrival in arrivals:
-            minutes = _bus_minutes_away(arrival.expected_arrival)
-            # Use the bus stop's compass direction (e.g. "SW") for grouping,
-            # falling back to the stop name when direction is unavailable.
-            # status_text stays in the `status` field for display purposes.
-            bus_direction = stop.direction if (stop and stop.direction) else stop_name
+            minutes = _bus_minutes_away(arrival.expected_arrival, now_ts)
             results.append(
-                NearbyTransitArrival(
+                construct(
                     route_id=arrival.route_id,
                     stop_name=stop_name,
                     direction=bus_direction,
@@ -349,14 +362,31 @@ async def _fetch_nearby_buses(
     return results
 
 
-def _bus_minutes_away(expected: datetime | None) -> int:
-    """Calculate minutes until a bus arrival."""
+def _nearest_stops(
+    stops: list[BusStop], lat: float, lon: float, k: int,
+) -> list[BusStop]:
+    """Return the *k* stops closest to ``(lat, lon)``, nearest first.
+
+    OBA returns every stop inside the bounding box in no particular
+    order, so the first *k* are not necessarily the closest.  Distance
+    is ranked on an equirectangular projection (longitude scaled by
+    ``cos(lat)``) — plenty accurate over a few hundred meters and far
+    cheaper than haversine.
+    """
+    kx = math.cos(math.radians(lat)) ** 2
+    d2 = [(s.lat - lat) ** 2 + kx * (s.lon - lon) ** 2 for s in stops]
+    idx = heapq.nsmallest(k, range(len(stops)), key=d2.__getitem__)
+    return [stops[i] for i in idx]
+
+
+def _bus_minutes_away(expected: datetime | None, now_ts: float) -> int:
+    """Calculate minutes until a bus arrival.
+
+    *now_ts* is the current epoch time, captured once per request by the
+    caller so each arrival costs a single float subtraction.
+    """
     if expected is None:
         return 99
-    from datetime import timezone
-
-    now = datetime.now(timezone.utc)
     if expected.tzinfo is None:
-        expected = expected.replace(tzinfo=timezone.utc)
-    diff = (expected - now).total_seconds()
-    return max(0, int(diff // 60))
+        expected = expected.replace(tzinfo=_UTC)
+    return max(0, int((expected.timestamp() - now_ts) // 60))
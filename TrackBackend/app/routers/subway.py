@@ -7,9 +7,13 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import math
+
+from fastapi import APIRouter, HTTPException, Response
 
 from app.config import LINE_TO_URL_KEY
+from app.constants import SUBWAY_COLORS
 from app.models import (
     AllSubwayLinesResponse,
     AllSubwayStationsResponse,
@@ -21,24 +25,12 @@ from app.models import (
 )
 from app.services.data_cleaner import get_arrivals_for_line
 from app.services.subway_shapes import get_all_subway_stations, get_subway_route_shape
+from app.utils.cache import async_ttl_cache
 from app.utils.logger import TrackLogger
+from app.utils.polyline import encode_polyline
 
 router = APIRouter(tags=["subway"])
 
-# Official MTA subway line colors
-_SUBWAY_COLORS: dict[str, str] = {
-    "1": "#EE352E", "2": "#EE352E", "3": "#EE352E",
-    "4": "#00933C", "5": "#00933C", "6": "#00933C",
-    "7": "#B933AD",
-    "A": "#0039A6", "C": "#0039A6", "E": "#0039A6",
-    "B": "#FF6319", "D": "#FF6319", "F": "#FF6319", "M": "#FF6319",
-    "G": "#6CBE45",
-    "J": "#996633", "Z": "#996633",
-    "L": "#A7A9AC",
-    "N": "#FCCC0A", "Q": "#FCCC0A", "R": "#FCCC0A", "W": "#FCCC0A",
-    "S": "#808183", "SI": "#808183",
-}
-
 # All subway lines to include in the full system map
 _ALL_LINES = [
     "1", "2", "3", "4", "5", "6", "7",
@@ -52,13 +44,56 @@ _ALL_LINES = [
 
 
 @router.get("/subway/shapes/all", response_model=AllSubwayLinesResponse)
-async def subway_shapes_all() -> AllSubwayLinesResponse:
+async def subway_shapes_all() -> Response:
     """Return polylines for ALL subway lines — the full system map.
 
     This is called once on app launch to draw every subway line on the
     map with the correct MTA colors.  The response is lightweight
     (polylines + color only, no stop lists) to keep it fast.
     """
+    return _static_json(await _all_line_overlays_body())
+
+
+@router.get("/subway/stations/all", response_model=AllSubwayStationsResponse)
+async def subway_stations_all() -> Response:
+    """Return all unique subway stations with the lines that serve them.
+
+    This data allows the map to display "Penn Station (1 2 3 A C E)"
+    markers just like Apple Maps.
+    """
+    return _static_json(await _all_stations_body())
+
+
+# The static GTFS never changes at runtime, so each response is built and
+# serialized once and later requests just send the cached bytes.  The build
+# is CPU-bound (CSV parsing + polyline encoding); running it in a worker
+# thread keeps the event loop serving other requests meanwhile, and the
+# single-flight cache makes concurrent first callers share one build.
+
+_STATIC_CACHE_CONTROL = "public, max-age=86400"
+
+
+def _static_json(body: bytes) -> Response:
+    """Wrap a pre-serialized static GTFS body in a cacheable response."""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Cache-Control": _STATIC_CACHE_CONTROL},
+    )
+
+
+@async_ttl_cache(math.inf, maxsize=1)
+async def _all_line_overlays_body() -> bytes:
+    return await asyncio.to_thread(lambda: _build_line_overlays().model_dump_json().encode())
+
+
+@async_ttl_cache(math.inf, maxsize=1)
+async def _all_stations_body() -> bytes:
+    return await asyncio.to_thread(lambda: _build_stations().model_dump_json().encode())
+
+
+def _build_line_overlays() -> AllSubwayLinesResponse:
+    """Encode every line's polylines for the full system map."""
     overlays: list[SubwayLineOverlay] = []
 
     for line in _ALL_LINES:
@@ -66,25 +101,20 @@ async def subway_shapes_all() -> AllSubwayLinesResponse:
         if result is None:
             continue
         polylines_raw, _stops = result
-        encoded = [_encode_polyline(coords) for coords in polylines_raw]
-        color = _SUBWAY_COLORS.get(line, "#808183")
+        encoded = [encode_polyline(coords) for coords in polylines_raw]
+        color = SUBWAY_COLORS.get(line, "#808183")
         overlays.append(SubwayLineOverlay(
             route_id=line,
             color_hex=color,
             polylines=encoded,
         ))
 
-    TrackLogger.info(f"Subway shapes/all: {len(overlays)} lines returned")
+    TrackLogger.info(f"Subway shapes/all: {len(overlays)} lines built")
     return AllSubwayLinesResponse(lines=overlays)
 
 
-@router.get("/subway/stations/all", response_model=AllSubwayStationsResponse)
-async def subway_stations_all() -> AllSubwayStationsResponse:
-    """Return all unique subway stations with the lines that serve them.
-
-    This data allows the map to display "Penn Station (1 2 3 A C E)"
-    markers just like Apple Maps.
-    """
+def _build_stations() -> AllSubwayStationsResponse:
+    """Build the station list from the static GTFS."""
     raw_stations = get_all_subway_stations()
     stations = []
     for s in raw_stations:
@@ -117,7 +147,7 @@ async def subway_shape(route_id: str) -> RouteShape:
     # Google-encode each polyline for transmission
     encoded_polylines: list[str] = []
     for coords in polylines_raw:
-        encoded_polylines.append(_encode_polyline(coords))
+        encoded_polylines.append(encode_polyline(coords))
 
     stops = [
         BusStop(
@@ -154,31 +184,3 @@ async def subway_arrivals(line_id: str) -> list[TrackArrival]:
         return await get_arrivals_for_line(upper)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
-
-
-def _encode_polyline(coords: list[tuple[float, float]]) -> str:
-    """Encode a list of (lat, lon) tuples into a Google-encoded polyline string."""
-    encoded: list[str] = []
-    prev_lat = 0
-    prev_lon = 0
-
-    for lat, lon in coords:
-        lat_e5 = round(lat * 1e5)
-        lon_e5 = round(lon * 1e5)
-        _encode_value(lat_e5 - prev_lat, encoded)
-        _encode_value(lon_e5 - prev_lon, encoded)
-        prev_lat = lat_e5
-        prev_lon = lon_e5
-
-    return "".join(encoded)
-
-
-def _encode_value(value: int, result: list[str]) -> None:
-    """Encode a single signed value into Google polyline encoding."""
-    v = ~(value << 1) if value < 0 else (value << 1)
-    while v >= 0x20:
-        result.append(chr(((v & 0x1F) | 0x20) + 63))
-        v >>= 5
-    result.append(chr(v + 63))
-
-
@@ -12,23 +12,56 @@
 
 from __future__ import annotations
 
+import asyncio
+import sys
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
 from urllib.parse import quote
 
 import httpx
+import orjson
 
 from app.config import get_settings
-from app.models import BusArrival, BusRoute, BusStop, BusVehicle, RouteShape
-
-
-def _get_timeout() -> httpx.Timeout:
-    """Build an httpx Timeout from settings."""
-    settings = get_settings()
-    return httpx.Timeout(
-        settings.app_settings.http_timeout_seconds,
-        connect=settings.app_settings.http_connect_timeout_seconds,
-    )
+from app.models import (
+    BusArrival,
+    BusRoute,
+    BusStop,
+    BusVehicle,
+    RouteBundle,
+    RouteShape,
+)
+from app.services.http_client import get_client
+from app.utils.cache import async_ttl_cache
+from app.utils.logger import TrackLogger
+
+# Bus stop locations change on the scale of service changes, not minutes.
+_NEARBY_STOPS_TTL_SECONDS = 3600.0
+
+# The OBA route list is equally static.  A route's stops and shape both come
+# from one stops-for-route response and share its shorter window, so detours
+# published as shape changes show up sooner.  The /bus/route-shape router
+# caches its body and sets Cache-Control from the same constant.
+_OBA_STATIC_TTL_SECONDS = 3600.0
+STOPS_FOR_ROUTE_TTL_SECONDS = 300.0
+
+# Meters → degrees for the OBA search box.  One degree of latitude is
+# ~111 km; one degree of longitude is ~85 km at NYC's latitude.
+_METERS_PER_DEG_LAT = 111_000
+_METERS_PER_DEG_LON_NYC = 85_000
+_MIN_SPAN_DEG = 0.005
+
+# Nearby-stop lookups are cached per ~110 m grid cell (3 decimal places of a
+# degree), so users standing close together share one OBA request.
+_NEARBY_STOPS_GRID_DECIMALS = 3
+
+# Bound once so the per-visit SIRI loop skips the attribute lookup.
+_fromisoformat = datetime.fromisoformat
+
+# SIRI repeats a handful of status phrases ("approaching", "1 stop away")
+# and line refs across every visit; interning makes each one a single
+# shared object instead of a fresh string per row.
+_intern = sys.intern
 
 
 async def _fetch_bus_json(url: str, params: dict[str, str]) -> Any:
@@ -37,10 +70,66 @@ async def _fetch_bus_json(url: str, params: dict[str, str]) -> Any:
     Raises :class:`httpx.HTTPStatusError` on 4xx/5xx responses so callers
     can translate 401/403 into a clean 503 for the iOS client.
     """
-    async with httpx.AsyncClient(timeout=_get_timeout()) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    response = await get_client().get(url, params=params)
+    response.raise_for_status()
+    # SIRI envelopes are deeply nested; orjson parses them several times
+    # faster than the stdlib decoder behind response.json().
+    return orjson.loads(response.content)
+
+
+def _oba_data(payload: Any) -> dict[str, Any]:
+    """Return the ``data`` object of an OBA response, or ``{}``.
+
+    The one place OBA payloads are shape-checked, so callers can chain
+    plain ``.get()`` lookups on the result.
+    """
+    if isinstance(payload, dict):
+        data = payload.get("data")
+        if isinstance(data, dict):
+            return data
+    return {}
+
+
+def _siri_delivery(payload: Any, kind: str) -> dict[str, Any]:
+    """Return the first ``Siri.ServiceDelivery.<kind>`` entry, or ``{}``."""
+    if isinstance(payload, dict):
+        deliveries = payload.get("Siri", {}).get("ServiceDelivery", {}).get(kind)
+        if deliveries:
+            return deliveries[0]
+    return {}
+
+
+def _to_float(raw: Any) -> float | None:
+    """Return *raw* as a float, or ``None`` if missing or non-numeric.
+
+    SIRI sends numbers as JSON numbers, so the common case is a type check
+    with no ``try`` block; numeric strings still go through ``float()``.
+    """
+    if raw is None:
+        return None
+    if type(raw) is float:
+        return raw
+    if isinstance(raw, int):
+        return float(raw)
+    try:
+        return float(raw)
+    except (ValueError, TypeError):
+        return None
+
+
+def _bus_stop(raw: dict[str, Any]) -> BusStop:
+    """Build a BusStop from an OBA stop record.
+
+    OBA already types these fields, so the model is constructed without
+    re-running validation — this runs for every stop in every listing.
+    """
+    return BusStop.model_construct(
+        id=raw.get("id", ""),
+        name=raw.get("name", ""),
+        lat=raw.get("lat", 0.0),
+        lon=raw.get("lon", 0.0),
+        direction=raw.get("direction"),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -48,6 +137,7 @@ async def _fetch_bus_json(url: str, params: dict[str, str]) -> Any:
 # ---------------------------------------------------------------------------
 
 
+@async_ttl_cache(_OBA_STATIC_TTL_SECONDS)
 async def get_routes() -> list[BusRoute]:
     """Fetch all bus routes from the OBA ``routes-for-agency`` endpoint."""
     settings = get_settings()
@@ -59,16 +149,12 @@ async def get_routes() -> list[BusRoute]:
     params = {"key": settings.api_keys.mta_bus_key}
 
     data = await _fetch_bus_json(url, params)
-    routes_data: list[dict[str, Any]] = (
-        data.get("data", {}).get("list", [])
-        if isinstance(data, dict)
-        else []
-    )
+    routes_data: list[dict[str, Any]] = _oba_data(data).get("list", [])
 
     results: list[BusRoute] = []
     for r in routes_data:
         results.append(
-            BusRoute(
+            BusRoute.model_construct(
                 id=r.get("id", ""),
                 short_name=r.get("shortName", ""),
                 long_name=r.get("longName", ""),
@@ -79,111 +165,116 @@ async def get_routes() -> list[BusRoute]:
     return results
 
 
-async def get_stops(route_id: str) -> list[BusStop]:
-    """Fetch stops for a specific route from OBA ``stops-for-route``.
+@async_ttl_cache(STOPS_FOR_ROUTE_TTL_SECONDS)
+async def _fetch_stops_for_route(route_id: str) -> dict[str, Any] | None:
+    """Fetch OBA ``stops-for-route`` (with polylines) and return its ``data``.
 
-    *route_id* must be fully qualified (e.g. ``"MTA NYCT_B63"``).
-    Polylines are disabled to keep the payload small.
+    Shared by :func:`get_stops` and :func:`get_route_shape`, which are
+    usually requested together for the same route, so the pair costs one
+    upstream call.  Returns ``None`` when bus endpoints aren't configured.
     """
     settings = get_settings()
     eps = settings.urls.bus_endpoints
     if eps is None:
-        return []
+        return None
 
-    # URL-encode the route_id for the path
+    # URL-encode the route_id for the path (e.g. "MTA NYCT_B63" → "MTA%20NYCT_B63")
     encoded_id = quote(route_id, safe="")
     path = eps.stops_for_route.replace("{route_id}", encoded_id)
     url = settings.urls.bus_oba_base + path
     params = {
         "key": settings.api_keys.mta_bus_key,
-        "includePolylines": "false",
+        "includePolylines": "true",
         "version": "2",
     }
 
-    data = await _fetch_bus_json(url, params)
+    return _oba_data(await _fetch_bus_json(url, params))
+
+
+@async_ttl_cache(STOPS_FOR_ROUTE_TTL_SECONDS)
+async def get_stops(route_id: str) -> list[BusStop]:
+    """Fetch stops for a specific route from OBA ``stops-for-route``.
+
+    *route_id* must be fully qualified (e.g. ``"MTA NYCT_B63"``).
+    """
+    oba = await _fetch_stops_for_route(route_id)
+    if oba is None:
+        return []
 
     # Stops are in data.references.stops
-    stops_data: list[dict[str, Any]] = (
-        data.get("data", {}).get("references", {}).get("stops", [])
-        if isinstance(data, dict)
-        else []
-    )
+    stops_data: list[dict[str, Any]] = oba.get("references", {}).get("stops", [])
+
+    return [_bus_stop(s) for s in stops_data]
 
-    results: list[BusStop] = []
-    for s in stops_data:
-        results.append(
-            BusStop(
-                id=s.get("id", ""),
-                name=s.get("name", ""),
-                lat=s.get("lat", 0.0),
-                lon=s.get("lon", 0.0),
-                direction=s.get("direction"),
-            )
-        )
-    return results
 
+@lru_cache(maxsize=16)
+def _spans_for_radius(radius_m: int) -> tuple[str, str]:
+    """OBA ``(latSpan, lonSpan)`` params for a search radius.
+
+    Radii come from a handful of UI presets, so the formatted strings are
+    computed once per radius.
+    """
+    lat_span = max(_MIN_SPAN_DEG, radius_m / _METERS_PER_DEG_LAT)
+    lon_span = max(_MIN_SPAN_DEG, radius_m / _METERS_PER_DEG_LON_NYC)
+    return f"{lat_span:.6f}", f"{lon_span:.6f}"
+
+
+def _nearby_stops_key(
+    lat: float, lon: float, radius_m: int | None = None, *, retries: int | None = None,
+) -> tuple[float, float, int | None]:
+    """Cache key for :func:`get_nearby_stops`: the caller's grid cell."""
+    return (
+        round(lat, _NEARBY_STOPS_GRID_DECIMALS),
+        round(lon, _NEARBY_STOPS_GRID_DECIMALS),
+        radius_m,
+    )
 
+
+@async_ttl_cache(_NEARBY_STOPS_TTL_SECONDS, key=_nearby_stops_key)
 async def get_nearby_stops(
-    lat: float, lon: float, radius_m: int | None = None,
+    lat: float, lon: float, radius_m: int | None = None, *, retries: int | None = None,
 ) -> list[BusStop]:
     """Fetch bus stops near a GPS coordinate using OBA ``stops-for-location``.
 
     *radius_m* is the search radius in meters.  It is converted to a
     degree-based bounding box (``latSpan`` / ``lonSpan``) for the OBA
-    API.  One degree of latitude ≈ 111 km; one degree of longitude ≈
-    85 km at NYC's latitude.
+    API.
 
     Includes retry logic because the MTA OBA API frequently returns 504.
+    *retries* overrides ``http_max_retries``; callers working to a short
+    deadline pass ``0`` rather than sleep through a retry they'd cancel.
+    Successful results are cached for an hour and shared by every caller
+    in the same ~110 m grid cell; the search box comfortably covers that
+    offset, and callers rank the stops by their own position.
     """
-    import asyncio
-
     settings = get_settings()
     effective_radius = radius_m if radius_m is not None else settings.app_settings.search_radius_meters
     eps = settings.urls.bus_endpoints
     if eps is None:
         return []
 
-    # Convert meters → degrees.
-    _METERS_PER_DEG_LAT = 111_000
-    _METERS_PER_DEG_LON_NYC = 85_000
-
-    lat_span = max(0.005, effective_radius / _METERS_PER_DEG_LAT)
-    lon_span = max(0.005, effective_radius / _METERS_PER_DEG_LON_NYC)
+    lat_span, lon_span = _spans_for_radius(effective_radius)
 
     url = settings.urls.bus_oba_base + eps.stops_near_location
     params = {
         "key": settings.api_keys.mta_bus_key,
-        "lat": str(lat),
-        "lon": str(lon),
-        "latSpan": f"{lat_span:.6f}",
-        "lonSpan": f"{lon_span:.6f}",
+        # Six decimals is ~0.1 m, far finer than the search box needs
+        "lat": f"{lat:.6f}",
+        "lon": f"{lon:.6f}",
+        "latSpan": lat_span,
+        "lonSpan": lon_span,
     }
 
     # Retry logic driven by settings
-    max_retries = settings.app_settings.http_max_retries
+    max_retries = settings.app_settings.http_max_retries if retries is None else retries
     retry_delay = settings.app_settings.http_retry_delay_seconds
     last_error: Exception | None = None
     for attempt in range(max_retries + 1):
         try:
             data = await _fetch_bus_json(url, params)
-            stops_data: list[dict[str, Any]] = (
-                data.get("data", {}).get("stops", [])
-                if isinstance(data, dict)
-                else []
-            )
+            stops_data: list[dict[str, Any]] = _oba_data(data).get("stops", [])
 
-            results: list[BusStop] = []
-            for s in stops_data:
-                results.append(
-                    BusStop(
-                        id=s.get("id", ""),
-                        name=s.get("name", ""),
-                        lat=s.get("lat", 0.0),
-                        lon=s.get("lon", 0.0),
-                        direction=s.get("direction"),
-                    )
-                )
-            return results
+            return [_bus_stop(s) for s in stops_data]
         except (httpx.HTTPStatusError, httpx.TimeoutException) as exc:
             last_error = exc
             if attempt < max_retries:
@@ -225,17 +316,9 @@ async def get_realtime_arrivals(stop_id: str) -> list[BusArrival]:
     data = await _fetch_bus_json(url, params)
 
     # Navigate the SIRI envelope
-    deliveries: list[dict[str, Any]] = (
-        data.get("Siri", {})
-        .get("ServiceDelivery", {})
-        .get("StopMonitoringDelivery", [])
-        if isinstance(data, dict)
-        else []
+    visits: list[dict[str, Any]] = (
+        _siri_delivery(data, "StopMonitoringDelivery").get("MonitoredStopVisit", [])
     )
-    if not deliveries:
-        return []
-
-    visits: list[dict[str, Any]] = deliveries[0].get("MonitoredStopVisit", [])
 
     arrivals: list[BusArrival] = []
     for visit in visits:
@@ -252,7 +335,7 @@ async def get_realtime_arrivals(stop_id: str) -> list[BusArrival]:
         expected_arrival: datetime | None = None
         if expected_str:
             try:
-                expected_arrival = datetime.fromisoformat(expected_str)
+                expected_arrival = _fromisoformat(expected_str)
             except (ValueError, TypeError):
                 expected_arrival = None
 
@@ -260,23 +343,9 @@ async def get_realtime_arrivals(stop_id: str) -> list[BusArrival]:
         if not status_text and expected_arrival is None:
             continue
 
-        # Distance in meters from the stop
-        distance_meters: float | None = None
-        raw_dist = distances.get("DistanceFromCall")
-        if raw_dist is not None:
-            try:
-                distance_meters = float(raw_dist)
-            except (ValueError, TypeError):
-                pass
-
-        # Vehicle bearing
-        bearing: float | None = None
-        raw_bearing = journey.get("Bearing")
-        if raw_bearing is not None:
-            try:
-                bearing = float(raw_bearing)
-            except (ValueError, TypeError):
-                pass
+        # Distance in meters from the stop, and vehicle bearing
+        distance_meters = _to_float(distances.get("DistanceFromCall"))
+        bearing = _to_float(journey.get("Bearing"))
 
         # Route identifier - prefer LineRef, fallback to PublishedLineName
         raw_route = journey.get("LineRef")
@@ -285,11 +354,11 @@ async def get_realtime_arrivals(stop_id: str) -> list[BusArrival]:
             raw_route = names[0] if names else ""
 
         arrivals.append(
-            BusArrival(
-                route_id=raw_route or "",
+            BusArrival.model_construct(
+                route_id=_intern(raw_route) if raw_route else "",
                 vehicle_id=journey.get("VehicleRef", ""),
                 stop_id=stop_id,
-                status_text=status_text or "En Route",
+                status_text=_intern(status_text) if status_text else "En Route",
                 expected_arrival=expected_arrival,
                 distance_meters=distance_meters,
                 bearing=bearing,
@@ -299,6 +368,31 @@ async def get_realtime_arrivals(stop_id: str) -> list[BusArrival]:
     return arrivals
 
 
+async def get_realtime_arrivals_batch(
+    stop_ids: list[str],
+) -> dict[str, list[BusArrival]]:
+    """Fetch real-time arrivals for several stops, keyed by stop id.
+
+    MTA's SIRI ``stop-monitoring`` accepts a single ``MonitoringRef``, so
+    the stops are requested concurrently; over the shared HTTP/2 client
+    they are multiplexed on one connection.  A stop whose request fails
+    is logged and left out of the result.
+    """
+    unique_ids = list(dict.fromkeys(stop_ids))
+    results = await asyncio.gather(
+        *(get_realtime_arrivals(stop_id) for stop_id in unique_ids),
+        return_exceptions=True,
+    )
+
+    by_stop: dict[str, list[BusArrival]] = {}
+    for stop_id, arrivals in zip(unique_ids, results):
+        if isinstance(arrivals, BaseException):
+            TrackLogger.error(f"Bus arrivals for stop '{stop_id}' failed: {arrivals}")
+            continue
+        by_stop[stop_id] = arrivals
+    return by_stop
+
+
 # ---------------------------------------------------------------------------
 # SIRI (Vehicle Monitoring) helpers
 # ---------------------------------------------------------------------------
@@ -326,41 +420,21 @@ async def get_vehicle_positions(route_id: str) -> list[BusVehicle]:
 
     data = await _fetch_bus_json(url, params)
 
-    deliveries: list[dict[str, Any]] = (
-        data.get("Siri", {})
-        .get("ServiceDelivery", {})
-        .get("VehicleMonitoringDelivery", [])
-        if isinstance(data, dict)
-        else []
+    activities: list[dict[str, Any]] = (
+        _siri_delivery(data, "VehicleMonitoringDelivery").get("VehicleActivity", [])
     )
-    if not deliveries:
-        return []
-
-    activities: list[dict[str, Any]] = deliveries[0].get("VehicleActivity", [])
 
     vehicles: list[BusVehicle] = []
     for activity in activities:
         journey = activity.get("MonitoredVehicleJourney", {})
         location = journey.get("VehicleLocation", {})
 
-        lat = location.get("Latitude")
-        lon = location.get("Longitude")
-        if lat is None or lon is None:
+        lat_f = _to_float(location.get("Latitude"))
+        lon_f = _to_float(location.get("Longitude"))
+        if lat_f is None or lon_f is None:
             continue
 
-        try:
-            lat_f = float(lat)
-            lon_f = float(lon)
-        except (ValueError, TypeError):
-            continue
-
-        bearing: float | None = None
-        raw_bearing = journey.get("Bearing")
-        if raw_bearing is not None:
-            try:
-                bearing = float(raw_bearing)
-            except (ValueError, TypeError):
-                pass
+        bearing = _to_float(journey.get("Bearing"))
 
         # Next stop name
         monitored_call = journey.get("MonitoredCall", {})
@@ -374,68 +448,69 @@ async def get_vehicle_positions(route_id: str) -> list[BusVehicle]:
         status_text = distances.get("PresentableDistance")
 
         vehicles.append(
-            BusVehicle(
+            BusVehicle.model_construct(
                 vehicle_id=journey.get("VehicleRef", ""),
-                route_id=journey.get("LineRef", route_id),
+                route_id=_intern(journey.get("LineRef") or route_id),
                 lat=lat_f,
                 lon=lon_f,
                 bearing=bearing,
                 next_stop=next_stop,
-                status_text=status_text,
+                status_text=_intern(status_text) if status_text else status_text,
             )
         )
 
     return vehicles
 
 
+@async_ttl_cache(STOPS_FOR_ROUTE_TTL_SECONDS)
 async def get_route_shape(route_id: str) -> RouteShape:
     """Fetch the route shape (polylines + stops) from OBA ``stops-for-route``.
 
     Returns encoded polylines for drawing the route on a map, along with
     all stops on the route. *route_id* must be fully qualified.
     """
-    settings = get_settings()
-    eps = settings.urls.bus_endpoints
-    if eps is None:
+    oba = await _fetch_stops_for_route(route_id)
+    if oba is None:
         return RouteShape(route_id=route_id, polylines=[], stops=[])
 
-    # URL-encode the route_id for the path (e.g. "MTA NYCT_B63" → "MTA%20NYCT_B63")
-    encoded_id = quote(route_id, safe="")
-    path = eps.stops_for_route.replace("{route_id}", encoded_id)
-    url = settings.urls.bus_oba_base + path
-    params = {
-        "key": settings.api_keys.mta_bus_key,
-        "includePolylines": "true",
-        "version": "2",
-    }
-
-    data = await _fetch_bus_json(url, params)
-
     # Extract polylines
     polylines: list[str] = []
-    entry = data.get("data", {}).get("entry", {}) if isinstance(data, dict) else {}
+    entry = oba.get("entry", {})
     for poly in entry.get("polylines", []):
         encoded = poly.get("points", "")
         if encoded:
             polylines.append(encoded)
 
     # Extract stops from references
-    stops_data: list[dict[str, Any]] = (
-        data.get("data", {}).get("references", {}).get("stops", [])
-        if isinstance(data, dict)
-        else []
-    )
+    stops_data: list[dict[str, Any]] = oba.get("references", {}).get("stops", [])
+
+    stops = [_bus_stop(s) for s in stops_data]
+
+    return RouteShape.model_construct(route_id=route_id, polylines=polylines, stops=stops)
 
-    stops: list[BusStop] = []
-    for s in stops_data:
-        stops.append(
-            BusStop(
-                id=s.get("id", ""),
-                name=s.get("name", ""),
-                lat=s.get("lat", 0.0),
-                lon=s.get("lon", 0.0),
-                direction=s.get("direction"),
-            )
-        )
 
-    return RouteShape(route_id=route_id, polylines=polylines, stops=stops)
+async def get_route_bundle(route_id: str, stop_id: str | None = None) -> RouteBundle:
+    """Fetch a route's shape, live vehicles and (optionally) one stop's arrivals.
+
+    The OBA and SIRI requests are independent, so they run concurrently
+    over the shared client and the screen waits for the slowest one
+    rather than the sum.  *route_id* must be fully qualified.
+    """
+    if stop_id:
+        shape, vehicles, arrivals = await asyncio.gather(
+            get_route_shape(route_id),
+            get_vehicle_positions(route_id),
+            get_realtime_arrivals(stop_id),
+        )
+    else:
+        shape, vehicles = await asyncio.gather(
+            get_route_shape(route_id),
+            get_vehicle_positions(route_id),
+        )
+        arrivals = []
+    return RouteBundle.model_construct(
+        route_id=route_id,
+        shape=shape,
+        vehicles=vehicles,
+        arrivals=arrivals,
+    )
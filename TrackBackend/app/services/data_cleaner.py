@@ -9,6 +9,7 @@
 from __future__ import annotations
 
 import time
+from operator import itemgetter
 from typing import Any
 
 from google.transit import gtfs_realtime_pb2  # type: ignore[import-untyped]
@@ -17,69 +18,76 @@ from app.config import get_feed_url
 from app.models import ElevatorStatus, TrackArrival, TransitAlert
 from app.services.mta_client import fetch_json, fetch_protobuf
 from app.services.station_lookup import get_stop_name
+from app.utils.cache import async_ttl_cache
 
+# GTFS-RT feeds refresh roughly every 30 s; concurrent /nearby and /subway
+# requests within this window share one download + decode per feed.
+_FEED_CACHE_TTL_SECONDS = 15.0
 
-def _minutes_until(epoch: int) -> int:
-    """Return the number of whole minutes from *now* until *epoch*."""
-    diff = epoch - int(time.time())
-    return max(0, diff // 60)
 
+def _destination_name(last_stop_id: str) -> str | None:
+    """Station name for a trip's final stop, or None when it is unknown."""
+    destination = get_stop_name(last_stop_id)
+    return None if destination == "Unknown" else destination
 
+
+def _arrival_rows(raw: bytes) -> list[tuple[str, str, str | None, int]]:
+    """Decode a GTFS-RT feed into ``(route, stop_id, destination, minutes)`` rows."""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(raw)
+
+    # Unset sub-messages read as empty defaults, so truthiness checks replace
+    # the HasField() calls, and "now" is read once for the whole feed.
+    now = int(time.time())
+    rows: list[tuple[str, str, str | None, int]] = []
+    append = rows.append
+    for entity in feed.entity:
+        updates = entity.trip_update.stop_time_update
+        if not updates:
+            continue
+        route = entity.trip_update.trip.route_id  # e.g. "A", "C", "E" from the ACE feed
+        destination = _destination_name(updates[-1].stop_id)
+        for stu in updates:
+            arrival_time = stu.arrival.time
+            if arrival_time:
+                minutes = (arrival_time - now) // 60
+                append((route, stu.stop_id, destination, minutes if minutes > 0 else 0))
+    return rows
+
+
+@async_ttl_cache(_FEED_CACHE_TTL_SECONDS, key=get_feed_url)
 async def get_arrivals_for_line(line_id: str) -> list[TrackArrival]:
     """Fetch & decode GTFS-RT Protobuf for *line_id*, returning clean arrivals.
 
     Each feed covers a family of lines (e.g. ACE, BDFM).  We return
     ALL routes found in the feed — not just the representative letter —
     so the caller gets every train from that feed.
+
+    Results are cached per feed URL for a few seconds and shared between
+    callers, so the returned list must not be mutated.
     """
     url = get_feed_url(line_id)
     if url is None:
         return []
 
-    raw = await fetch_protobuf(url)
-
-    feed = gtfs_realtime_pb2.FeedMessage()
-    feed.ParseFromString(raw)
-
-    arrivals: list[TrackArrival] = []
-
-    for entity in feed.entity:
-        if not entity.HasField("trip_update"):
-            continue
-        trip = entity.trip_update
-        route = trip.trip.route_id  # e.g. "A", "C", "E" from the ACE feed
-        
-        # Determine destination from the last stop in the update
-        destination = None
-        if trip.stop_time_update:
-            last_stop_id = trip.stop_time_update[-1].stop_id
-            destination = get_stop_name(last_stop_id)
-            # If default lookup failed (returned "Unknown"), try parent ID
-            if destination == "Unknown" and len(last_stop_id) > 1 and last_stop_id[-1] in "NS":
-                destination = get_stop_name(last_stop_id[:-1])
-            
-            if destination == "Unknown":
-                destination = None
-
-        for stu in trip.stop_time_update:
-            arrival_time = stu.arrival.time if stu.HasField("arrival") else 0
-            if arrival_time == 0:
-                continue
-            minutes = _minutes_until(arrival_time)
-            direction = "N" if stu.stop_id.endswith("N") else "S"
-            arrivals.append(
-                TrackArrival(
-                    route_id=route,
-                    station=stu.stop_id,
-                    direction=direction,
-                    destination=destination,
-                    minutes_away=minutes,
-                    status="On Time",
-                )
-            )
-
-    arrivals.sort(key=lambda a: a.minutes_away)
-    return arrivals
+    # The wire bytes and the decoded FeedMessage are both released when
+    # _arrival_rows returns, so a large feed isn't held alongside the models.
+    rows = _arrival_rows(await fetch_protobuf(url))
+    rows.sort(key=itemgetter(3))
+
+    # Fields come straight from the decoded feed — skip re-validation
+    construct = TrackArrival.model_construct
+    return [
+        construct(
+            route_id=route,
+            station=stop_id,
+            direction="N" if stop_id[-1:] == "N" else "S",
+            destination=destination,
+            minutes_away=minutes,
+            status="On Time",
+        )
+        for route, stop_id, destination, minutes in rows
+    ]
 
 
 async def get_alerts() -> list[TransitAlert]:
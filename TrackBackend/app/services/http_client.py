@@ -0,0 +1,53 @@
+#
+# http_client.py
+# TrackBackend
+#
+# Shared pooled httpx client for all outbound MTA requests.
+# Reusing one client keeps TCP/TLS connections alive between calls,
+# and HTTP/2 lets the concurrent subway-feed and bus fetches share a
+# single socket per host.
+#
+
+from __future__ import annotations
+
+import httpx
+
+from app.config import get_settings
+
+# Upper bounds for the shared connection pool.
+_MAX_CONNECTIONS = 64
+_MAX_KEEPALIVE_CONNECTIONS = 32
+
+_client: httpx.AsyncClient | None = None
+
+
+def _get_timeout() -> httpx.Timeout:
+    """Build an httpx Timeout from settings."""
+    settings = get_settings()
+    return httpx.Timeout(
+        settings.app_settings.http_timeout_seconds,
+        connect=settings.app_settings.http_connect_timeout_seconds,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=_get_timeout(),
+            limits=httpx.Limits(
+                max_connections=_MAX_CONNECTIONS,
+                max_keepalive_connections=_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and drop its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -10,18 +10,10 @@ from __future__ import annotations
 
 from typing import Any
 
-import httpx
+import orjson
 
 from app.config import get_settings
-
-
-def _get_timeout() -> httpx.Timeout:
-    """Build an httpx Timeout from settings."""
-    settings = get_settings()
-    return httpx.Timeout(
-        settings.app_settings.http_timeout_seconds,
-        connect=settings.app_settings.http_connect_timeout_seconds,
-    )
+from app.services.http_client import get_client
 
 
 async def fetch_protobuf(url: str) -> bytes:
@@ -30,10 +22,9 @@ async def fetch_protobuf(url: str) -> bytes:
     headers = {}
     if settings.api_keys.mta_api_key:
         headers["x-api-key"] = settings.api_keys.mta_api_key
-    async with httpx.AsyncClient(timeout=_get_timeout()) as client:
-        response = await client.get(url, headers=headers)
-        response.raise_for_status()
-        return response.content
+    response = await get_client().get(url, headers=headers)
+    response.raise_for_status()
+    return response.content
 
 
 async def fetch_json(url: str) -> Any:
@@ -42,7 +33,6 @@ async def fetch_json(url: str) -> Any:
     headers = {}
     if settings.api_keys.mta_api_key:
         headers["x-api-key"] = settings.api_keys.mta_api_key
-    async with httpx.AsyncClient(timeout=_get_timeout()) as client:
-        response = await client.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
+    response = await get_client().get(url, headers=headers)
+    response.raise_for_status()
+    return orjson.loads(response.content)
@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import csv
 import math
+from collections.abc import Mapping
 from functools import lru_cache
 from pathlib import Path
 from typing import NamedTuple
@@ -31,41 +32,87 @@ def _load_stops() -> dict[str, StopInfo]:
     if not _STOPS_PATH.exists():
         return stops
 
-    with open(_STOPS_PATH, encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+    with open(_STOPS_PATH, encoding="utf-8", newline="") as f:
+        # Plain csv.reader with column indexes from the header: no per-row
+        # dict, which DictReader would build for every one of ~1.5k rows.
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return stops
+        col = {name: i for i, name in enumerate(header)}
+        i_id, i_name = col["stop_id"], col.get("stop_name")
+        i_lat, i_lon = col["stop_lat"], col["stop_lon"]
         for row in reader:
-            stop_id = row.get("stop_id", "").strip()
-            if not stop_id:
-                continue
             try:
-                lat = float(row.get("stop_lat", "0"))
-                lon = float(row.get("stop_lon", "0"))
-            except ValueError:
+                stop_id = row[i_id].strip()
+                if not stop_id:
+                    continue
+                lat = float(row[i_lat] or "0")
+                lon = float(row[i_lon] or "0")
+            except (IndexError, ValueError):
                 continue
-            stops[stop_id] = StopInfo(
-                stop_id=stop_id,
-                name=row.get("stop_name", "Unknown"),
-                lat=lat,
-                lon=lon,
-            )
+            name = row[i_name] if i_name is not None and i_name < len(row) else "Unknown"
+            stops[stop_id] = StopInfo(stop_id, name, lat, lon)
 
     return stops
 
 
+@lru_cache(maxsize=1)
+def _stop_columns() -> tuple[tuple[str, ...], tuple[float, ...], tuple[float, ...]]:
+    """The stops as parallel (ids, lats, lons) columns for the radius scan."""
+    stops = _load_stops().values()
+    return (
+        tuple(s.stop_id for s in stops),
+        tuple(s.lat for s in stops),
+        tuple(s.lon for s in stops),
+    )
+
+
+def get_all_stops() -> Mapping[str, StopInfo]:
+    """Return the full stop_id → StopInfo mapping (read-only).
+
+    For loops that resolve many stops: binding the mapping once and calling
+    ``.get()`` skips a Python-level call per stop.
+    """
+    return _load_stops()
+
+
 def get_stop_info(stop_id: str) -> StopInfo | None:
     """Look up a single stop by its GTFS stop_id (e.g. 'L12N')."""
     return _load_stops().get(stop_id)
 
 
+@lru_cache(maxsize=1)
+def _stop_names() -> dict[str, str]:
+    """stop_id → name, with N/S platform aliases for every parent station.
+
+    A directional ID (e.g. 'L12N') therefore resolves in a single lookup
+    even when stops.txt only lists its parent.
+    """
+    names = {stop_id: info.name for stop_id, info in _load_stops().items()}
+    for stop_id, name in list(names.items()):
+        if stop_id[-1] not in "NS":
+            names.setdefault(stop_id + "N", name)
+            names.setdefault(stop_id + "S", name)
+    return names
+
+
 def get_stop_name(stop_id: str) -> str:
     """Return the human-readable station name for a stop_id, or the raw ID if unknown."""
-    info = get_stop_info(stop_id)
-    return info.name if info else stop_id
+    return _stop_names().get(stop_id, stop_id)
+
+
+_EARTH_RADIUS_M = 6_371_000
+_METERS_PER_DEG = _EARTH_RADIUS_M * math.pi / 180
 
 
 def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Haversine distance between two lat/lon points, in meters."""
-    R = 6_371_000  # Earth radius in meters
+    """Haversine distance between two lat/lon points, in meters.
+
+    Not used on the request path; it is the reference the equirectangular
+    check below is tested against.
+    """
+    R = _EARTH_RADIUS_M
     phi1, phi2 = math.radians(lat1), math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
     dlam = math.radians(lon2 - lon1)
@@ -73,22 +120,52 @@ def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+def _within_radius_approx(
+    lat1: float, lon1: float, lat2: float, lon2: float, radius_m: float,
+) -> bool:
+    """Equirectangular radius check: no trig per point and no sqrt.
+
+    Longitude is scaled by ``cos`` of the first latitude.  Over the few
+    kilometers this app searches, the error against haversine is well
+    under 0.1%.
+    """
+    dy = (lat2 - lat1) * _METERS_PER_DEG
+    dx = (lon2 - lon1) * _METERS_PER_DEG * math.cos(math.radians(lat1))
+    return dx * dx + dy * dy <= radius_m * radius_m
+
+
 def is_stop_nearby(stop_id: str, lat: float, lon: float, radius_m: float) -> bool:
     """Return True if the stop_id is within radius_m meters of (lat, lon)."""
     info = get_stop_info(stop_id)
     if info is None:
         return False
-    return _haversine_m(lat, lon, info.lat, info.lon) <= radius_m
+    return _within_radius_approx(lat, lon, info.lat, info.lon, radius_m)
 
 
 def get_nearby_stop_ids(lat: float, lon: float, radius_m: float) -> set[str]:
     """Return the set of stop_ids within radius_m meters of (lat, lon).
 
     Only returns parent stops and directional stops (N/S suffixed)
-    that are within the radius.
+    that are within the radius.  Distances use the equirectangular
+    approximation (see :func:`_within_radius_approx`).
     """
+    # Bounding box in degrees around the query point.  Its longitude span
+    # is taken at the box edge nearest the pole, so it always contains the
+    # radius circle and only the few stops inside it get a distance check.
+    dlat = radius_m / _METERS_PER_DEG
+    cos_edge = math.cos(math.radians(min(abs(lat) + dlat, 90.0)))
+    dlon = dlat / cos_edge if cos_edge > 1e-9 else 360.0
+    lat_lo, lat_hi = lat - dlat, lat + dlat
+    lon_lo, lon_hi = lon - dlon, lon + dlon
+
+    # Equirectangular check in squared degrees, hoisted out of the loop
+    kx = math.cos(math.radians(lat)) ** 2
+    r2 = dlat * dlat
+
+    ids, lats, lons = _stop_columns()
     nearby: set[str] = set()
-    for stop_id, info in _load_stops().items():
-        if _haversine_m(lat, lon, info.lat, info.lon) <= radius_m:
-            nearby.add(stop_id)
+    for stop_id, slat, slon in zip(ids, lats, lons):
+        if lat_lo <= slat <= lat_hi and lon_lo <= slon <= lon_hi:
+            if (slat - lat) ** 2 + kx * (slon - lon) ** 2 <= r2:
+                nearby.add(stop_id)
     return nearby
@@ -16,13 +16,15 @@
 from __future__ import annotations
 
 import csv
-import json
 from collections import defaultdict
 from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from typing import NamedTuple
 
-from app.services.station_lookup import get_stop_info
+import orjson
+
+from app.services.station_lookup import get_all_stops
 
 _DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 _SHAPES_PATH = _DATA_DIR / "shapes.txt"
@@ -30,18 +32,12 @@ _TRIPS_PATH = _DATA_DIR / "trips.txt"
 _SHAPE_STOPS_PATH = _DATA_DIR / "shape_stops.json"
 
 
-class ShapePoint(NamedTuple):
-    lat: float
-    lon: float
-    sequence: int
-
-
 class RouteStopEntry(NamedTuple):
     stop_id: str
+    parent_id: str  # stop_id without its N/S platform suffix
     name: str
     lat: float
     lon: float
-    sequence: int
 
 
 # ---------------------------------------------------------------------------
@@ -49,31 +45,59 @@ class RouteStopEntry(NamedTuple):
 # ---------------------------------------------------------------------------
 
 @lru_cache(maxsize=1)
-def _load_shapes() -> dict[str, list[ShapePoint]]:
-    """Parse shapes.txt into a dict of shape_id → sorted list of ShapePoints."""
-    shapes: dict[str, list[ShapePoint]] = defaultdict(list)
+def _load_shapes() -> dict[str, list[tuple[float, float]]]:
+    """Parse shapes.txt into a dict of shape_id → ordered (lat, lon) points.
+
+    Only the shapes chosen by :func:`_load_route_shapes` are kept — about a
+    quarter of the file — so rows for branch variants nobody draws are
+    skipped before any float parsing.  The sequence number is only needed
+    for ordering, so points are stored as plain coordinate tuples that
+    callers can hand straight to the polyline encoder.
+    """
+    rows: dict[str, list[tuple[int, float, float]]] = defaultdict(list)
+    # Shapes that saw a point out of sequence order; MTA emits shapes.txt
+    # already ordered, so normally this stays empty and nothing is sorted.
+    unordered: set[str] = set()
     if not _SHAPES_PATH.exists():
-        return dict(shapes)
-
-    with open(_SHAPES_PATH, encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        return {}
+    wanted = {
+        shape_id
+        for direction_shapes in _load_route_shapes().values()
+        for shape_id in direction_shapes.values()
+    }
+
+    with open(_SHAPES_PATH, encoding="utf-8", newline="") as f:
+        # Plain csv.reader with column indexes resolved once from the header;
+        # shapes.txt has ~150k rows, so skipping DictReader's per-row dict
+        # matters here.
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return {}
+        i_id = header.index("shape_id")
+        i_lat = header.index("shape_pt_lat")
+        i_lon = header.index("shape_pt_lon")
+        i_seq = header.index("shape_pt_sequence")
         for row in reader:
-            shape_id = row.get("shape_id", "").strip()
-            if not shape_id:
-                continue
             try:
-                lat = float(row["shape_pt_lat"])
-                lon = float(row["shape_pt_lon"])
-                seq = int(row["shape_pt_sequence"])
-            except (ValueError, KeyError):
+                shape_id = row[i_id].strip()
+                if shape_id not in wanted:
+                    continue
+                point = (int(row[i_seq]), float(row[i_lat]), float(row[i_lon]))
+            except (ValueError, IndexError):
                 continue
-            shapes[shape_id].append(ShapePoint(lat=lat, lon=lon, sequence=seq))
+            pts = rows[shape_id]
+            if pts and point[0] < pts[-1][0]:
+                unordered.add(shape_id)
+            pts.append(point)
 
-    # Sort each shape's points by sequence
-    for pts in shapes.values():
-        pts.sort(key=lambda p: p.sequence)
-
-    return dict(shapes)
+    # Order each shape's points by sequence, then drop the sequence
+    shapes: dict[str, list[tuple[float, float]]] = {}
+    for shape_id, pts in rows.items():
+        if shape_id in unordered:
+            pts.sort(key=itemgetter(0))
+        shapes[shape_id] = [(lat, lon) for _seq, lat, lon in pts]
+    return shapes
 
 
 # ---------------------------------------------------------------------------
@@ -93,31 +117,43 @@ def _load_route_shapes() -> dict[str, dict[int, str]]:
     if not _TRIPS_PATH.exists():
         return {}
 
-    with open(_TRIPS_PATH, encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+    with open(_TRIPS_PATH, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return {}
+        i_route = header.index("route_id")
+        i_shape = header.index("shape_id")
+        i_dir = header.index("direction_id")
         for row in reader:
-            route_id = row.get("route_id", "").strip()
-            shape_id = row.get("shape_id", "").strip()
+            try:
+                route_id = row[i_route].strip()
+                shape_id = row[i_shape].strip()
+                raw_direction = row[i_dir]
+            except IndexError:
+                continue
             if not route_id or not shape_id:
                 continue
             try:
-                direction = int(row.get("direction_id", "0"))
+                direction = int(raw_direction)
             except ValueError:
                 direction = 0
             all_shapes[route_id][direction].add(shape_id)
 
-    # Pick the shape with the most stops per direction
-    shape_stops = _load_shape_stops()
+    # Pick the shape with the most stops per direction.  Ties (common for
+    # short-turn variants) go to the greatest shape_id so the choice does
+    # not depend on set iteration order.
+    stop_counts = {sid: len(stops) for sid, stops in _load_shape_stops().items()}
+
+    def _rank(sid: str) -> tuple[int, str]:
+        return stop_counts.get(sid, 0), sid
+
     result: dict[str, dict[int, str]] = {}
     for route_id, dir_map in all_shapes.items():
-        result[route_id] = {}
-        for direction, shape_ids in dir_map.items():
-            # Pick the shape_id with the most stops
-            best_shape = max(
-                shape_ids,
-                key=lambda sid: len(shape_stops.get(sid, [])),
-            )
-            result[route_id][direction] = best_shape
+        result[route_id] = {
+            direction: max(shape_ids, key=_rank)
+            for direction, shape_ids in dir_map.items()
+        }
 
     return result
 
@@ -131,53 +167,72 @@ def _load_shape_stops() -> dict[str, list[str]]:
     """Load the pre-computed shape_id → [stop_ids] mapping."""
     if not _SHAPE_STOPS_PATH.exists():
         return {}
-    with open(_SHAPE_STOPS_PATH, encoding="utf-8") as f:
-        return json.load(f)
+    return orjson.loads(_SHAPE_STOPS_PATH.read_bytes())
 
 
-def _get_stops_for_shape(shape_id: str) -> list[RouteStopEntry]:
-    """Return the ordered stop list for a shape_id, with resolved names/coords."""
+@lru_cache(maxsize=512)
+def _get_stops_for_shape(shape_id: str) -> tuple[RouteStopEntry, ...]:
+    """Return the ordered stops for a shape_id, with resolved names/coords.
+
+    Memoized — shapes are shared by many routes and the system-map build
+    visits each one repeatedly — so the result is an immutable tuple.
+    """
     shape_stops = _load_shape_stops()
     stop_ids = shape_stops.get(shape_id, [])
     if not stop_ids:
-        return []
+        return ()
 
+    stops = get_all_stops()
     entries: list[RouteStopEntry] = []
     seen_names: set[str] = set()
 
-    for seq, stop_id in enumerate(stop_ids):
-        info = get_stop_info(stop_id)
+    for stop_id in stop_ids:
+        info = stops.get(stop_id)
         if info is None:
             continue
         # Deduplicate by station name (N/S versions of same station share a name)
         if info.name in seen_names:
             continue
         seen_names.add(info.name)
+        # Convert child ID (L06N) to parent ID (L06).  Standard MTA IDs
+        # are 3 chars + N/S; anything else is its own parent.
+        parent_id = stop_id[:-1] if len(stop_id) > 1 and stop_id[-1] in "NS" else stop_id
         entries.append(RouteStopEntry(
             stop_id=stop_id,
+            parent_id=parent_id,
             name=info.name,
             lat=info.lat,
             lon=info.lon,
-            sequence=seq,
         ))
 
-    return entries
+    return tuple(entries)
 
 
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
+def warmup() -> None:
+    """Parse the static GTFS files now instead of on the first request."""
+    get_all_stops()
+    _load_shape_stops()
+    _load_route_shapes()
+    _load_shapes()
+
+
+@lru_cache(maxsize=64)
 def get_subway_route_shape(
     route_id: str,
-) -> tuple[list[list[tuple[float, float]]], list[RouteStopEntry]] | None:
+) -> tuple[tuple[list[tuple[float, float]], ...], tuple[RouteStopEntry, ...]] | None:
     """Return the full route geometry and ordered stops for a subway line.
 
     Returns a tuple of:
-    - polylines: list of coordinate lists (each is [(lat, lon), ...])
-    - stops: ordered list of RouteStopEntry with name, lat, lon
+    - polylines: tuple of coordinate lists (each is [(lat, lon), ...])
+    - stops: ordered tuple of RouteStopEntry with name, lat, lon
 
-    Returns None if the route/shape data is not available.
+    The result is memoized per route and the coordinate lists are shared
+    with the shape cache, so none of it may be mutated.  Returns None if
+    the route/shape data is not available.
     """
     route_shapes = _load_route_shapes()
     direction_shapes = route_shapes.get(route_id)
@@ -186,12 +241,12 @@ def get_subway_route_shape(
 
     shapes_data = _load_shapes()
     polylines: list[list[tuple[float, float]]] = []
-    all_stops: list[RouteStopEntry] = []
+    all_stops: tuple[RouteStopEntry, ...] = ()
 
     for direction_id, shape_id in sorted(direction_shapes.items()):
         shape_points = shapes_data.get(shape_id)
         if shape_points:
-            polylines.append([(p.lat, p.lon) for p in shape_points])
+            polylines.append(shape_points)
 
         # Only collect stops from one direction to avoid duplicate station names
         if not all_stops:
@@ -200,7 +255,7 @@ def get_subway_route_shape(
     if not polylines:
         return None
 
-    return polylines, all_stops
+    return tuple(polylines), all_stops
 
 
 def get_all_subway_stations() -> list[dict]:
@@ -209,46 +264,28 @@ def get_all_subway_stations() -> list[dict]:
     Groups stops by parent ID (e.g. '120N' and '120S' -> '120') so that
     Transfer/Express stations show up as a single dot with all lines.
     """
-    route_shapes = _load_route_shapes()
-
-    # Map parent_id -> {name, lat, lon, routes: set}
-    stations: dict[str, dict] = {}
-
-    for route_id, directions in route_shapes.items():
-        # Only process one direction per route to avoid double counting,
-        # BUT some stops might only be on one side. Better to process all.
-        visited_shapes = set()
-        for shape_id in directions.values():
-            if shape_id in visited_shapes:
-                continue
-            visited_shapes.add(shape_id)
-
-            stops = _get_stops_for_shape(shape_id)
-            for stop in stops:
-                # Convert child ID (L06N) to parent ID (L06)
-                # Standard MTA IDs are 3 chars + N/S. Some are different.
-                # If it ends in N or S and len > 1, strip it.
-                parent_id = stop.stop_id
-                if len(parent_id) > 1 and parent_id[-1] in "NS":
-                    parent_id = parent_id[:-1]
-
-                if parent_id not in stations:
-                    stations[parent_id] = {
-                        "id": parent_id,
-                        # Use the stop name (e.g. "8 Av")
-                        "name": stop.name,
-                        "lat": stop.lat,
-                        "lon": stop.lon,
-                        "routes": set(),
-                    }
-                
-                stations[parent_id]["routes"].add(route_id)
-
-    # Convert to list
-    results = []
-    for s in stations.values():
-        # Sort routes: 1,2,3,A,C,E...
-        s["routes"] = sorted(list(s["routes"]))
-        results.append(s)
-
-    return results
+    # parent_id -> (name, lat, lon) from the first stop seen, and
+    # parent_id -> routes; merged only when building the result.
+    meta: dict[str, tuple[str, float, float]] = {}
+    routes_by_station: dict[str, set[str]] = defaultdict(set)
+
+    for route_id, directions in _load_route_shapes().items():
+        # Visit each distinct shape of the route once; both directions are
+        # needed because some stops are only served on one side.  Shapes
+        # are not skipped across routes, or a shared shape would lose lines.
+        for shape_id in dict.fromkeys(directions.values()):
+            for stop in _get_stops_for_shape(shape_id):
+                meta.setdefault(stop.parent_id, (stop.name, stop.lat, stop.lon))
+                routes_by_station[stop.parent_id].add(route_id)
+
+    # Sort routes: 1,2,3,A,C,E...
+    return [
+        {
+            "id": parent_id,
+            "name": name,
+            "lat": lat,
+            "lon": lon,
+            "routes": sorted(routes_by_station[parent_id]),
+        }
+        for parent_id, (name, lat, lon) in meta.items()
+    ]
@@ -0,0 +1,105 @@
+#
+# cache.py
+# TrackBackend
+#
+# Small in-process TTL cache for async service calls. Concurrent callers
+# asking for the same key share a single in-flight fetch, so a burst of
+# iOS refreshes turns into one upstream MTA request per TTL window.
+#
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+import weakref
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# Every wrapper built by async_ttl_cache, so tests can reset them all
+_wrappers: weakref.WeakSet[Callable[..., Any]] = weakref.WeakSet()
+
+
+class _KeyLock:
+    """A per-key lock plus the number of callers holding or waiting on it."""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+def async_ttl_cache(
+    ttl: float,
+    *,
+    maxsize: int = 256,
+    key: Callable[..., Hashable] | None = None,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Cache the result of an async function for *ttl* seconds.
+
+    *key* maps the call arguments to a cache key; by default the positional
+    and keyword arguments are used as-is.  When more than *maxsize* keys are
+    stored the oldest entry is evicted.  Exceptions are never cached.
+
+    Cached values are shared between callers and must be treated as
+    read-only.  The wrapper exposes ``cache_clear()`` for tests.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        entries: dict[Hashable, tuple[float, T]] = {}
+        # Only keys with a fetch in flight have a lock, so failing keys
+        # (junk route IDs, an upstream outage) can't pile them up.
+        locks: dict[Hashable, _KeyLock] = {}
+
+        def _fresh(k: Hashable) -> tuple[float, T] | None:
+            hit = entries.get(k)
+            if hit is not None and time.monotonic() - hit[0] < ttl:
+                return hit
+            return None
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            k = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            hit = _fresh(k)
+            if hit is not None:
+                return hit[1]
+
+            slot = locks.get(k)
+            if slot is None:
+                slot = locks[k] = _KeyLock()
+            slot.users += 1
+            try:
+                async with slot.lock:
+                    # Another caller may have filled the entry while we waited
+                    hit = _fresh(k)
+                    if hit is not None:
+                        return hit[1]
+                    value = await fn(*args, **kwargs)
+                    entries.pop(k, None)
+                    entries[k] = (time.monotonic(), value)
+                    while len(entries) > maxsize:
+                        del entries[next(iter(entries))]
+                    return value
+            finally:
+                slot.users -= 1
+                if not slot.users and locks.get(k) is slot:
+                    del locks[k]
+
+        def cache_clear() -> None:
+            entries.clear()
+            locks.clear()
+
+        wrapper.cache_clear = cache_clear  # type: ignore[attr-defined]
+        _wrappers.add(wrapper)
+        return wrapper
+
+    return decorator
+
+
+def clear_all_caches() -> None:
+    """Empty every :func:`async_ttl_cache` in the process (used by tests)."""
+    for wrapper in list(_wrappers):
+        wrapper.cache_clear()  # type: ignore[attr-defined]
@@ -1,13 +1,39 @@
+import logging
+import os
+import sys
+
 from colorama import Fore, Style, init
-import pyfiglet
 
 # Initialize colorama
 init(autoreset=True)
 
+# Messages go through the stdlib "track" logger so the level can be tuned
+# with TRACK_LOG_LEVEL (e.g. WARNING in production) and skipped messages
+# are never formatted.  Output stays the same colored lines on stdout.
+_log = logging.getLogger("track")
+if not _log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _log.addHandler(_handler)
+    _log.propagate = False
+_level = os.environ.get("TRACK_LOG_LEVEL", "INFO").upper()
+_log.setLevel(_level if _level in logging.getLevelNamesMapping() else logging.INFO)
+
 
 class TrackLogger:
+    # Set TRACK_LOG_REQUESTS=0 (or TRACK_LOG_LEVEL above INFO) to turn off
+    # the per-request access log.
+    requests_enabled = (
+        os.environ.get("TRACK_LOG_REQUESTS", "1") != "0"
+        and _log.isEnabledFor(logging.INFO)
+    )
+
     @staticmethod
     def startup():
+        # Imported here so every module that logs doesn't pay for pyfiglet;
+        # only the banner needs it.
+        import pyfiglet
+
         # Print giant ASCII banner
         banner = pyfiglet.figlet_format("TRACK", font="slant")
         print(Fore.CYAN + Style.BRIGHT + banner)
@@ -16,22 +42,40 @@ class TrackLogger:
 
     @staticmethod
     def info(msg):
-        print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} {msg}")
+        _log.info("%s[INFO]%s %s", Fore.GREEN, Style.RESET_ALL, msg)
 
     @staticmethod
     def error(msg):
-        print(f"{Fore.RED}[ERROR]{Style.RESET_ALL} {msg}")
+        _log.error("%s[ERROR]%s %s", Fore.RED, Style.RESET_ALL, msg)
 
     @staticmethod
-    def request(method, path, status):
-        color = Fore.GREEN if status < 400 else Fore.RED
-        print(f"{Fore.BLUE}[REQ]{Style.RESET_ALL} {method} {path} -> {color}{status}{Style.RESET_ALL}")
+    def request(method, path, query, status):
+        TrackLogger.requests([(method, path, query, status)])
+
+    @staticmethod
+    def requests(entries):
+        """Emit a batch of ``(method, path, query, status)`` entries in one write.
+
+        Strings are only built here, after the enabled check, so callers can
+        pass the raw request pieces.
+        """
+        if not TrackLogger.requests_enabled:
+            return
+        lines = []
+        for method, path, query, status in entries:
+            if query:
+                path = f"{path}?{query}"
+            color = Fore.GREEN if status < 400 else Fore.RED
+            lines.append(f"{Fore.BLUE}[REQ]{Style.RESET_ALL} {method} {path} -> {color}{status}{Style.RESET_ALL}")
+        if lines:
+            _log.info("%s", "\n".join(lines))
 
     @staticmethod
     def location(lat, lon, endpoint=""):
-        print(
-            f"{Fore.MAGENTA}[LOCATION]{Style.RESET_ALL} "
-            f"lat={Fore.CYAN}{lat}{Style.RESET_ALL}, "
-            f"lon={Fore.CYAN}{lon}{Style.RESET_ALL} "
-            f"({endpoint})"
+        _log.info(
+            "%s[LOCATION]%s lat=%s%s%s, lon=%s%s%s (%s)",
+            Fore.MAGENTA, Style.RESET_ALL,
+            Fore.CYAN, lat, Style.RESET_ALL,
+            Fore.CYAN, lon, Style.RESET_ALL,
+            endpoint,
         )
@@ -0,0 +1,44 @@
+#
+# polyline.py
+# TrackBackend
+#
+# Google encoded-polyline encoder for drawing routes on the iOS map.
+#
+
+from __future__ import annotations
+
+
+def encode_polyline(coords: list[tuple[float, float]]) -> str:
+    """Encode a list of (lat, lon) tuples into a Google-encoded polyline string.
+
+    Deltas are zig-zag encoded with ``(d << 1) ^ (d >> 31)`` (no sign
+    branch) and written as 5-bit chunks straight into one ``bytearray``.
+    The lat/lon halves are unrolled to avoid a call per value.
+    """
+    out = bytearray()
+    append = out.append
+    prev_lat = 0
+    prev_lon = 0
+
+    for lat, lon in coords:
+        lat_e5 = round(lat * 1e5)
+        lon_e5 = round(lon * 1e5)
+
+        d = lat_e5 - prev_lat
+        v = (d << 1) ^ (d >> 31)
+        while v >= 0x20:
+            append((v & 0x1F | 0x20) + 63)
+            v >>= 5
+        append(v + 63)
+
+        d = lon_e5 - prev_lon
+        v = (d << 1) ^ (d >> 31)
+        while v >= 0x20:
+            append((v & 0x1F | 0x20) + 63)
+            v >>= 5
+        append(v + 63)
+
+        prev_lat = lat_e5
+        prev_lon = lon_e5
+
+    return out.decode("ascii")
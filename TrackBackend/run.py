@@ -1,6 +1,5 @@
 import os
 import sys
-import subprocess
 
 def main():
     """
@@ -11,33 +10,30 @@ def main():
     backend_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(backend_dir)
 
-    print("🚀 Starting Track Backend...")
-
-    # Define the command to run uvicorn
-    # Using 'python -m uvicorn' is more reliable than 'uvicorn' as it handles PATH issues better
-    uvicorn_cmd = ["uvicorn", "app.main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"]
-
     # Check for virtual environment
-    venv_python = None
-    if os.path.exists(".venv"):
-        if os.name == "nt":  # Windows
-            venv_python = os.path.join(".venv", "Scripts", "python.exe")
-        else:  # macOS/Linux
-            venv_python = os.path.join(".venv", "bin", "python")
-        
-        if os.path.exists(venv_python):
-            print(f"📦 Using virtual environment: {venv_python}")
-            cmd = [venv_python, "-m"] + uvicorn_cmd
-        else:
-            venv_python = None
+    venv_dir = os.path.abspath(".venv")
+    if os.name == "nt":  # Windows
+        venv_python = os.path.join(venv_dir, "Scripts", "python.exe")
+    else:  # macOS/Linux
+        venv_python = os.path.join(venv_dir, "bin", "python")
 
-    if not venv_python:
+    # sys.prefix is the venv directory when already running inside it
+    in_venv = os.path.abspath(sys.prefix) == venv_dir
+    if not in_venv and os.path.exists(venv_python):
+        print(f"📦 Using virtual environment: {venv_python}")
+        # Replace this process with the venv interpreter instead of
+        # spawning a child, so the server starts only one Python.
+        os.execv(venv_python, [venv_python, os.path.abspath(__file__)])
+
+    print("🚀 Starting Track Backend...")
+    if not in_venv:
         print("⚠️  Virtual environment not found or invalid. Using system python.")
-        cmd = [sys.executable, "-m"] + uvicorn_cmd
 
     try:
-        # Run the server
-        subprocess.run(cmd)
+        import uvicorn
+
+        # Run the server in this interpreter
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
     except KeyboardInterrupt:
         print("\n👋 Stopping Track Backend...")
     except Exception as e:
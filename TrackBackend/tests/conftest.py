@@ -0,0 +1,30 @@
+#
+# conftest.py
+# TrackBackend
+#
+# Shared pytest fixtures.
+#
+
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.cache import clear_all_caches
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the whole run, so the app lifespan (static GTFS
+    warmup, access-log drain, shared HTTP client) starts and stops once."""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def _clear_ttl_caches():
+    """Start and end every test with empty service caches."""
+    clear_all_caches()
+    yield
+    clear_all_caches()
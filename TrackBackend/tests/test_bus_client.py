@@ -0,0 +1,121 @@
+#
+# test_bus_client.py
+# TrackBackend
+#
+# Tests for the bus_client service: batched SIRI arrivals, nearby-stop
+# lookups and the OBA static-data caches.
+#
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from app.models import BusArrival
+from app.services.bus_client import (
+    get_nearby_stops,
+    get_realtime_arrivals_batch,
+    get_route_shape,
+    get_stops,
+)
+
+
+class TestRealtimeArrivalsBatch:
+    """Tests for get_realtime_arrivals_batch."""
+
+    @patch("app.services.bus_client.get_realtime_arrivals", new_callable=AsyncMock)
+    def test_keys_by_stop_and_skips_failures(self, mock_arrivals):
+        async def fake(stop_id):
+            if stop_id == "bad":
+                raise RuntimeError("SIRI down")
+            return [
+                BusArrival(
+                    route_id="MTA NYCT_B63", vehicle_id="V1",
+                    stop_id=stop_id, status_text="approaching",
+                ),
+            ]
+
+        mock_arrivals.side_effect = fake
+        result = asyncio.run(get_realtime_arrivals_batch(["S1", "bad", "S2", "S1"]))
+
+        assert set(result) == {"S1", "S2"}
+        assert result["S2"][0].stop_id == "S2"
+        # Duplicate ids are only fetched once
+        assert mock_arrivals.await_count == 3
+
+
+class TestNearbyStopsCache:
+    """Tests for the grid-cell cache on get_nearby_stops."""
+
+    @patch("app.services.bus_client._fetch_bus_json", new_callable=AsyncMock)
+    def test_close_coordinates_share_one_fetch(self, mock_fetch):
+        mock_fetch.return_value = {
+            "data": {"stops": [{"id": "S1", "name": "Stop 1", "lat": 40.7, "lon": -73.9}]},
+        }
+
+        async def run():
+            first = await get_nearby_stops(40.70012, -73.90004, radius_m=800)
+            second = await get_nearby_stops(40.70031, -73.89981, radius_m=800)
+            far = await get_nearby_stops(40.71, -73.90, radius_m=800)
+            return first, second, far
+
+        first, second, _far = asyncio.run(run())
+        assert first is second
+        assert mock_fetch.await_count == 2
+
+    @patch("app.services.bus_client._fetch_bus_json", new_callable=AsyncMock)
+    def test_retries_can_be_disabled(self, mock_fetch):
+        request = httpx.Request("GET", "https://bustime.mta.info")
+        mock_fetch.side_effect = httpx.HTTPStatusError(
+            "Gateway Timeout", request=request, response=httpx.Response(504, request=request),
+        )
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(get_nearby_stops(40.7, -73.9, radius_m=800, retries=0))
+        assert mock_fetch.await_count == 1
+
+
+class TestObaStaticCache:
+    """Tests for the TTL cache on the OBA static lookups."""
+
+    @patch("app.services.bus_client._fetch_bus_json", new_callable=AsyncMock)
+    def test_stops_fetched_once_per_route(self, mock_fetch):
+        mock_fetch.return_value = {
+            "data": {"references": {"stops": [
+                {"id": "S1", "name": "Stop 1", "lat": 40.7, "lon": -73.9},
+            ]}},
+        }
+
+        async def run():
+            first = await get_stops("MTA NYCT_B63")
+            again = await get_stops("MTA NYCT_B63")
+            other = await get_stops("MTA NYCT_B61")
+            return first, again, other
+
+        first, again, _other = asyncio.run(run())
+        assert first is again
+        assert [s.id for s in first] == ["S1"]
+        assert mock_fetch.await_count == 2
+
+    @patch("app.services.bus_client._fetch_bus_json", new_callable=AsyncMock)
+    def test_stops_and_shape_share_one_fetch(self, mock_fetch):
+        mock_fetch.return_value = {
+            "data": {
+                "entry": {"polylines": [{"points": "abc"}]},
+                "references": {"stops": [
+                    {"id": "S1", "name": "Stop 1", "lat": 40.7, "lon": -73.9},
+                ]},
+            },
+        }
+
+        async def run():
+            return await get_stops("MTA NYCT_B63"), await get_route_shape("MTA NYCT_B63")
+
+        stops, shape = asyncio.run(run())
+        assert [s.id for s in stops] == ["S1"]
+        assert shape.polylines == ["abc"]
+        assert [s.id for s in shape.stops] == ["S1"]
+        assert mock_fetch.await_count == 1
@@ -0,0 +1,125 @@
+#
+# test_cache.py
+# TrackBackend
+#
+# Tests for the async TTL cache used around MTA service calls.
+#
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.utils.cache import async_ttl_cache
+
+
+class TestAsyncTTLCache:
+    """Tests for the async_ttl_cache decorator."""
+
+    def test_returns_cached_value_within_ttl(self):
+        calls = []
+
+        @async_ttl_cache(60)
+        async def fetch(x):
+            calls.append(x)
+            return x * 2
+
+        async def run():
+            return [await fetch(2), await fetch(2), await fetch(3)]
+
+        assert asyncio.run(run()) == [4, 4, 6]
+        assert calls == [2, 3]
+
+    def test_expired_entry_is_refetched(self):
+        calls = []
+
+        @async_ttl_cache(0)
+        async def fetch(x):
+            calls.append(x)
+            return x
+
+        async def run():
+            await fetch(1)
+            await fetch(1)
+
+        asyncio.run(run())
+        assert calls == [1, 1]
+
+    def test_concurrent_callers_share_one_fetch(self):
+        calls = []
+
+        @async_ttl_cache(60)
+        async def fetch(x):
+            calls.append(x)
+            await asyncio.sleep(0.01)
+            return x
+
+        async def run():
+            return await asyncio.gather(*(fetch(7) for _ in range(5)))
+
+        assert asyncio.run(run()) == [7] * 5
+        assert calls == [7]
+
+    def test_custom_key(self):
+        calls = []
+
+        @async_ttl_cache(60, key=lambda name: name.upper())
+        async def fetch(name):
+            calls.append(name)
+            return name
+
+        async def run():
+            return [await fetch("a"), await fetch("A")]
+
+        assert asyncio.run(run()) == ["a", "a"]
+        assert calls == ["a"]
+
+    def test_exceptions_are_not_cached(self):
+        calls = []
+
+        @async_ttl_cache(60)
+        async def fetch():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("upstream down")
+            return "ok"
+
+        async def run():
+            with pytest.raises(RuntimeError):
+                await fetch()
+            return await fetch()
+
+        assert asyncio.run(run()) == "ok"
+        assert len(calls) == 2
+
+    def test_maxsize_evicts_oldest(self):
+        calls = []
+
+        @async_ttl_cache(60, maxsize=2)
+        async def fetch(x):
+            calls.append(x)
+            return x
+
+        async def run():
+            for x in (1, 2, 3, 1):
+                await fetch(x)
+
+        asyncio.run(run())
+        assert calls == [1, 2, 3, 1]
+
+    def test_failing_keys_leave_no_lock_behind(self):
+        @async_ttl_cache(60, maxsize=4)
+        async def fetch(x):
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+
+        async def run():
+            for x in range(100):
+                with pytest.raises(RuntimeError):
+                    await fetch(x)
+            await asyncio.gather(*(fetch(7) for _ in range(3)), return_exceptions=True)
+
+        asyncio.run(run())
+        cells = dict(zip(fetch.__code__.co_freevars, fetch.__closure__))
+        assert cells["locks"].cell_contents == {}
@@ -8,13 +8,14 @@
 
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
 
-from app.main import app
 from app.models import (
+    BusArrival,
     BusStop,
     BusVehicle,
     DirectionArrivals,
@@ -23,10 +24,8 @@ from app.models import (
     RouteShape,
     TrackArrival,
 )
-from app.routers.nearby import _group_arrivals
-
-client = TestClient(app)
-
+from app.routers.nearby import _group_arrivals, _nearest_stops
+from app.services.bus_client import STOPS_FOR_ROUTE_TTL_SECONDS
 
 class TestNearbyTransitArrivalModel:
     """Tests for the NearbyTransitArrival Pydantic model."""
@@ -123,17 +122,17 @@ class TestRouteShapeModel:
 class TestNearbyEndpoint:
     """Tests for the GET /nearby endpoint."""
 
-    def test_nearby_requires_lat_lon(self):
+    def test_nearby_requires_lat_lon(self, client):
         response = client.get("/nearby")
         assert response.status_code == 422
 
-    def test_nearby_requires_lon(self):
+    def test_nearby_requires_lon(self, client):
         response = client.get("/nearby?lat=40.7")
         assert response.status_code == 422
 
     @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
     @patch("app.routers.nearby._fetch_nearby_buses", new_callable=AsyncMock)
-    def test_nearby_returns_sorted_results(self, mock_buses, mock_subway):
+    def test_nearby_returns_sorted_results(self, mock_buses, mock_subway, client):
         mock_subway.return_value = [
             NearbyTransitArrival(
                 route_id="L",
@@ -166,7 +165,7 @@ class TestNearbyEndpoint:
 
     @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
     @patch("app.routers.nearby._fetch_nearby_buses", new_callable=AsyncMock)
-    def test_nearby_handles_empty_results(self, mock_buses, mock_subway):
+    def test_nearby_handles_empty_results(self, mock_buses, mock_subway, client):
         mock_subway.return_value = []
         mock_buses.return_value = []
 
@@ -176,7 +175,7 @@ class TestNearbyEndpoint:
 
     @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
     @patch("app.routers.nearby._fetch_nearby_buses", new_callable=AsyncMock)
-    def test_nearby_limits_to_20_results(self, mock_buses, mock_subway):
+    def test_nearby_limits_to_20_results(self, mock_buses, mock_subway, client):
         mock_subway.return_value = [
             NearbyTransitArrival(
                 route_id=f"L{i}",
@@ -205,7 +204,9 @@ class TestNearbyEndpoint:
 
     @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
     @patch("app.routers.nearby._fetch_nearby_buses", new_callable=AsyncMock)
-    def test_nearby_handles_subway_error_gracefully(self, mock_buses, mock_subway):
+    def test_nearby_handles_subway_error_gracefully(
+        self, mock_buses, mock_subway, client,
+    ):
         mock_subway.side_effect = Exception("Feed unavailable")
         mock_buses.return_value = [
             NearbyTransitArrival(
@@ -224,12 +225,39 @@ class TestNearbyEndpoint:
         assert len(data) == 1
         assert data[0]["mode"] == "bus"
 
+    @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
+    @patch("app.routers.nearby._fetch_nearby_buses")
+    def test_nearby_drops_branch_past_deadline(
+        self, mock_buses, mock_subway, monkeypatch, client,
+    ):
+        from app.config import get_settings
+
+        monkeypatch.setattr(get_settings().app_settings, "nearby_deadline_seconds", 0.05)
+
+        async def slow_buses(*_args):
+            await asyncio.sleep(5)
+            return []
+
+        mock_buses.side_effect = slow_buses
+        mock_subway.return_value = [
+            NearbyTransitArrival(
+                route_id="L", stop_name="1st Av", direction="N",
+                minutes_away=4, mode="subway",
+            ),
+        ]
+
+        response = client.get("/nearby?lat=40.7&lon=-73.9")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["mode"] == "subway"
+
 
 class TestBusVehiclesEndpoint:
     """Tests for the GET /bus/vehicles/{route_id} endpoint."""
 
     @patch("app.routers.bus.get_vehicle_positions", new_callable=AsyncMock)
-    def test_vehicles_returns_positions(self, mock_vehicles):
+    def test_vehicles_returns_positions(self, mock_vehicles, client):
         mock_vehicles.return_value = [
             BusVehicle(
                 vehicle_id="V1",
@@ -251,7 +279,7 @@ class TestBusVehiclesEndpoint:
         assert data[0]["bearing"] == 180.0
 
     @patch("app.routers.bus.get_vehicle_positions", new_callable=AsyncMock)
-    def test_vehicles_empty_route(self, mock_vehicles):
+    def test_vehicles_empty_route(self, mock_vehicles, client):
         mock_vehicles.return_value = []
 
         response = client.get("/bus/vehicles/MTA%20NYCT_X99")
@@ -259,11 +287,37 @@ class TestBusVehiclesEndpoint:
         assert response.json() == []
 
 
+class TestBusErrorMapping:
+    """Tests for the shared upstream-error handling on /bus endpoints."""
+
+    @patch("app.routers.bus.get_vehicle_positions", new_callable=AsyncMock)
+    def test_auth_failure_maps_to_503(self, mock_vehicles, client):
+        request = httpx.Request("GET", "https://bustime.mta.info")
+        mock_vehicles.side_effect = httpx.HTTPStatusError(
+            "Forbidden", request=request, response=httpx.Response(403, request=request),
+        )
+
+        response = client.get("/bus/vehicles/MTA%20NYCT_B63")
+        assert response.status_code == 503
+
+    @patch("app.routers.bus.get_vehicle_positions", new_callable=AsyncMock)
+    def test_other_failure_maps_to_502(self, mock_vehicles, client):
+        mock_vehicles.side_effect = RuntimeError("boom")
+
+        response = client.get("/bus/vehicles/MTA%20NYCT_B63")
+        assert response.status_code == 502
+        assert response.json()["detail"] == "boom"
+
+    def test_query_validation_still_applies(self, client):
+        response = client.get("/bus/nearby?lat=40.7")
+        assert response.status_code == 422
+
+
 class TestRouteShapeEndpoint:
     """Tests for the GET /bus/route-shape/{route_id} endpoint."""
 
     @patch("app.routers.bus.get_route_shape", new_callable=AsyncMock)
-    def test_route_shape_returns_polylines_and_stops(self, mock_shape):
+    def test_route_shape_returns_polylines_and_stops(self, mock_shape, client):
         mock_shape.return_value = RouteShape(
             route_id="MTA NYCT_B63",
             polylines=["encoded_poly_1"],
@@ -281,7 +335,7 @@ class TestRouteShapeEndpoint:
         assert data["stops"][0]["name"] == "Stop 1"
 
     @patch("app.routers.bus.get_route_shape", new_callable=AsyncMock)
-    def test_route_shape_empty(self, mock_shape):
+    def test_route_shape_empty(self, mock_shape, client):
         mock_shape.return_value = RouteShape(
             route_id="R1",
             polylines=[],
@@ -294,6 +348,84 @@ class TestRouteShapeEndpoint:
         assert data["polylines"] == []
         assert data["stops"] == []
 
+    @patch("app.routers.bus.get_route_shape", new_callable=AsyncMock)
+    def test_empty_route_shape_not_cached(self, mock_shape, client):
+        mock_shape.return_value = RouteShape(
+            route_id="MTA NYCT_X0", polylines=[], stops=[],
+        )
+
+        first = client.get("/bus/route-shape/MTA%20NYCT_X0")
+        second = client.get("/bus/route-shape/MTA%20NYCT_X0")
+        assert first.json() == second.json()
+        assert second.headers["cache-control"] == "no-store"
+        assert mock_shape.await_count == 2
+
+    @patch("app.routers.bus.get_route_shape", new_callable=AsyncMock)
+    def test_route_shape_cached_and_gzipped(self, mock_shape, client):
+        mock_shape.return_value = RouteShape(
+            route_id="MTA NYCT_M15", polylines=["p"], stops=[],
+        )
+
+        first = client.get("/bus/route-shape/MTA%20NYCT_M15")
+        second = client.get(
+            "/bus/route-shape/MTA%20NYCT_M15",
+            headers={"Accept-Encoding": "identity"},
+        )
+        assert first.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in second.headers
+        assert first.json() == second.json()
+        # Clients keep the shape exactly as long as the server does
+        assert second.headers["cache-control"] == (
+            f"public, max-age={int(STOPS_FOR_ROUTE_TTL_SECONDS)}"
+        )
+        assert mock_shape.await_count == 1
+
+
+class TestRouteBundleEndpoint:
+    """Tests for the GET /bus/route-bundle/{route_id} endpoint."""
+
+    @patch("app.services.bus_client.get_realtime_arrivals", new_callable=AsyncMock)
+    @patch("app.services.bus_client.get_vehicle_positions", new_callable=AsyncMock)
+    @patch("app.services.bus_client.get_route_shape", new_callable=AsyncMock)
+    def test_bundle_combines_shape_vehicles_and_arrivals(
+        self, mock_shape, mock_vehicles, mock_arrivals, client,
+    ):
+        mock_shape.return_value = RouteShape(
+            route_id="MTA NYCT_B63", polylines=["p"], stops=[],
+        )
+        mock_vehicles.return_value = [
+            BusVehicle(vehicle_id="V1", route_id="MTA NYCT_B63", lat=40.0, lon=-74.0),
+        ]
+        mock_arrivals.return_value = [
+            BusArrival(
+                route_id="MTA NYCT_B63", vehicle_id="V1",
+                stop_id="MTA_308214", status_text="approaching",
+            ),
+        ]
+
+        response = client.get("/bus/route-bundle/MTA%20NYCT_B63?stop_id=MTA_308214")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["route_id"] == "MTA NYCT_B63"
+        assert data["shape"]["polylines"] == ["p"]
+        assert [v["vehicle_id"] for v in data["vehicles"]] == ["V1"]
+        assert data["arrivals"][0]["stop_id"] == "MTA_308214"
+        mock_arrivals.assert_awaited_once_with("MTA_308214")
+
+    @patch("app.services.bus_client.get_realtime_arrivals", new_callable=AsyncMock)
+    @patch("app.services.bus_client.get_vehicle_positions", new_callable=AsyncMock)
+    @patch("app.services.bus_client.get_route_shape", new_callable=AsyncMock)
+    def test_bundle_without_stop_skips_arrivals(
+        self, mock_shape, mock_vehicles, mock_arrivals, client,
+    ):
+        mock_shape.return_value = RouteShape(route_id="R1", polylines=[], stops=[])
+        mock_vehicles.return_value = []
+
+        response = client.get("/bus/route-bundle/R1")
+        assert response.status_code == 200
+        assert response.json()["arrivals"] == []
+        mock_arrivals.assert_not_awaited()
+
 
 class TestGroupedModels:
     """Tests for the DirectionArrivals and GroupedNearbyTransit models."""
@@ -415,12 +547,29 @@ class TestGroupingLogic:
         assert groups[0].display_name == "B63"
 
 
+class TestNearestStops:
+    """Tests for the _nearest_stops helper."""
+
+    def test_picks_closest_regardless_of_input_order(self):
+        stops = [
+            BusStop(id="far", name="Far", lat=40.710, lon=-73.990),
+            BusStop(id="near", name="Near", lat=40.7001, lon=-73.9001),
+            BusStop(id="mid", name="Mid", lat=40.702, lon=-73.902),
+        ]
+        nearest = _nearest_stops(stops, 40.7, -73.9, 2)
+        assert [s.id for s in nearest] == ["near", "mid"]
+
+    def test_limit_larger_than_input(self):
+        stops = [BusStop(id="S1", name="Stop 1", lat=40.7, lon=-73.9)]
+        assert [s.id for s in _nearest_stops(stops, 40.7, -73.9, 3)] == ["S1"]
+
+
 class TestNearbyGroupedEndpoint:
     """Tests for the GET /nearby/grouped endpoint."""
 
     @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
     @patch("app.routers.nearby._fetch_nearby_buses", new_callable=AsyncMock)
-    def test_grouped_returns_grouped_results(self, mock_buses, mock_subway):
+    def test_grouped_returns_grouped_results(self, mock_buses, mock_subway, client):
         mock_subway.return_value = [
             NearbyTransitArrival(
                 route_id="A", stop_name="S1", direction="N",
@@ -443,7 +592,7 @@ class TestNearbyGroupedEndpoint:
 
     @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
     @patch("app.routers.nearby._fetch_nearby_buses", new_callable=AsyncMock)
-    def test_grouped_empty(self, mock_buses, mock_subway):
+    def test_grouped_empty(self, mock_buses, mock_subway, client):
         mock_subway.return_value = []
         mock_buses.return_value = []
 
@@ -453,7 +602,7 @@ class TestNearbyGroupedEndpoint:
 
     @patch("app.routers.nearby._fetch_nearby_subway", new_callable=AsyncMock)
     @patch("app.routers.nearby._fetch_nearby_buses", new_callable=AsyncMock)
-    def test_grouped_mixed_modes(self, mock_buses, mock_subway):
+    def test_grouped_mixed_modes(self, mock_buses, mock_subway, client):
         mock_subway.return_value = [
             NearbyTransitArrival(
                 route_id="L", stop_name="1st Av", direction="N",
@@ -0,0 +1,28 @@
+#
+# test_polyline.py
+# TrackBackend
+#
+# Tests for the Google encoded-polyline encoder.
+#
+
+from __future__ import annotations
+
+from app.utils.polyline import encode_polyline
+
+
+class TestEncodePolyline:
+    """Tests for encode_polyline."""
+
+    def test_google_reference_example(self):
+        coords = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+        assert encode_polyline(coords) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+    def test_empty(self):
+        assert encode_polyline([]) == ""
+
+    def test_zero_delta(self):
+        # Repeated points encode as a zero delta ("?")
+        assert encode_polyline([(0.0, 0.0), (0.0, 0.0)]) == "????"
+
+    def test_small_negative_delta(self):
+        assert encode_polyline([(-0.00001, 0.00001)]) == "@A"
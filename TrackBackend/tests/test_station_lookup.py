@@ -0,0 +1,37 @@
+#
+# test_station_lookup.py
+# TrackBackend
+#
+# Tests for the subway stop lookups in station_lookup.
+#
+
+from __future__ import annotations
+
+import pytest
+
+from app.services.station_lookup import (
+    _haversine_m,
+    get_all_stops,
+    get_nearby_stop_ids,
+    is_stop_nearby,
+)
+
+
+class TestNearbyStopIds:
+    """Tests for the subway stop radius scan in station_lookup."""
+
+    @pytest.mark.parametrize("radius", [150, 800, 3000])
+    def test_approximation_matches_haversine(self, radius):
+        # Times Sq area, dense enough to put stops near every radius edge
+        lat, lon = 40.7557, -73.9870
+        precise = {
+            stop_id
+            for stop_id, info in get_all_stops().items()
+            if _haversine_m(lat, lon, info.lat, info.lon) <= radius
+        }
+        assert get_nearby_stop_ids(lat, lon, radius) == precise
+
+    def test_is_stop_nearby(self):
+        assert is_stop_nearby("127", 40.7557, -73.9870, 200)
+        assert not is_stop_nearby("127", 40.6, -73.9870, 200)
+        assert not is_stop_nearby("NOPE", 40.7557, -73.9870, 200)